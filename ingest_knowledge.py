@@ -8,10 +8,16 @@ Usage:
     python ingest_knowledge.py rag_research_template.json
     python ingest_knowledge.py my_patterns.json --namespace custom_patterns
 """
-import json
+import asyncio
+import hashlib
+import os
 import sys
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+import httpx
+import ijson
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -22,11 +28,333 @@ sys.path.insert(0, str(Path(__file__).parent / "supa-langgraph-rag-scaffold" / "
 
 from app.core import RAGStore
 
+__all__ = [
+    "ingest_from_json",
+    "ingest_many",
+    "add_relations_bulk",
+    "test_search",
+    "list_namespaces",
+    "clear_namespace",
+    "main",
+]
+
+# Patterns per embeddings request / documents insert
+INGEST_BATCH_SIZE = 100
+# Batches embedded/inserted concurrently during Phase 1
+INGEST_CONCURRENCY = 4
+DEFAULT_NAMESPACE = "remotion_execution_patterns"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
+# Shared keep-alive pool for embedding requests (sized above INGEST_CONCURRENCY)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=32)
+
+_openai_client = None
+
+
+def _get_openai():
+    """Lazily create the OpenAI client used for batch embeddings."""
+    global _openai_client
+    if _openai_client is None:
+        from openai import OpenAI
+        _openai_client = OpenAI(http_client=httpx.Client(limits=HTTP_LIMITS, timeout=60.0))
+    return _openai_client
+
+
+def content_hash(content: str) -> str:
+    """Stable hash of document content, used to reuse embeddings."""
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def ingest_many(
+    rag: RAGStore,
+    namespace: str,
+    pattern_ids: list[str],
+    contents: list[str],
+    sources: list[Optional[str]],
+    types: list[Optional[str]],
+    embedding_cache: Optional[dict] = None,
+) -> list[str]:
+    """
+    Embed and upsert a batch of documents in one round-trip each.
+
+    The embeddings endpoint accepts a list of inputs, so a whole batch is
+    embedded with a single call and written with a single upsert keyed on
+    (namespace, pattern_id), which returns the stored rows in order. Contents
+    whose hash is already in `embedding_cache` or already stored in
+    `documents` (from a previous run) reuse that embedding instead.
+
+    Args:
+        rag: RAGStore whose Supabase client is used for the insert
+        namespace: Namespace to write the documents into
+        pattern_ids: Pattern ID per document (stable key for re-ingest)
+        contents: Document contents
+        sources: Source per document (None if missing)
+        types: Type per document (None if missing)
+        embedding_cache: content_hash -> embedding, shared across batches
+
+    Returns:
+        Document IDs, in the same order as pattern_ids
+    """
+    cache = embedding_cache if embedding_cache is not None else {}
+    hashes = [content_hash(content) for content in contents]
+
+    # Unique hashes not seen in this run: look for stored embeddings first
+    unseen = [h for h in dict.fromkeys(hashes) if h not in cache]
+    if unseen:
+        existing = (
+            rag.client.table("documents")
+            .select("content_hash, embedding")
+            .in_("content_hash", unseen)
+            .execute()
+        )
+        for row in existing.data:
+            cache.setdefault(row["content_hash"], row["embedding"])
+
+    # Embed whatever is still missing, once per unique content
+    to_embed = {h: content for h, content in zip(hashes, contents) if h not in cache}
+    if to_embed:
+        response = _get_openai().embeddings.create(input=list(to_embed.values()), model=EMBEDDING_MODEL)
+        for h, item in zip(to_embed, sorted(response.data, key=lambda d: d.index)):
+            cache[h] = item.embedding
+
+    rows = [
+        {
+            "namespace": namespace,
+            "pattern_id": pattern_id,
+            "content": content,
+            "content_hash": h,
+            "source": source,
+            "type": type_value,
+            "embedding": cache[h],
+        }
+        for pattern_id, content, h, source, type_value in zip(pattern_ids, contents, hashes, sources, types)
+    ]
+    result = (
+        rag.client.table("documents")
+        .upsert(rows, on_conflict="namespace,pattern_id")
+        .execute()
+    )
+    return [row["id"] for row in result.data]
+
+
+def add_relations_bulk(
+    rag: RAGStore,
+    namespace: str,
+    edges: list[tuple[str, str, str]],
+    errors: Optional[list[str]] = None,
+) -> int:
+    """
+    Insert graph relations in batched doc_relations upserts.
+
+    Edges that already exist (same namespace, endpoints and type, see
+    migration 016_doc_relations_unique.sql) are skipped, so re-ingesting a
+    file doesn't duplicate its relations.
+
+    Args:
+        rag: RAGStore whose Supabase client is used for the insert
+        namespace: Namespace the relations belong to
+        edges: (from_uuid, to_uuid, relation_type) tuples
+        errors: If given, a failed batch is retried edge by edge and each
+                failing edge is appended here instead of raising
+
+    Returns:
+        Number of relations newly created
+    """
+    def _upsert(chunk: list[tuple[str, str, str]]) -> int:
+        rows = [
+            {
+                "namespace": namespace,
+                "from_id": from_uuid,
+                "to_id": to_uuid,
+                "relation_type": relation_type,
+            }
+            for from_uuid, to_uuid, relation_type in chunk
+        ]
+        result = (
+            rag.client.table("doc_relations")
+            .upsert(rows, on_conflict="namespace,from_id,to_id,relation_type", ignore_duplicates=True)
+            .execute()
+        )
+        return len(result.data)
+
+    edges = list(dict.fromkeys(edges))
+    created = 0
+    for start in range(0, len(edges), INGEST_BATCH_SIZE):
+        chunk = edges[start:start + INGEST_BATCH_SIZE]
+        try:
+            created += _upsert(chunk)
+        except Exception:
+            if errors is None:
+                raise
+            # Upserts are idempotent, so retrying the chunk row by row is safe
+            for edge in chunk:
+                try:
+                    created += _upsert([edge])
+                except Exception as e:
+                    errors.append(f"Error creating relation {edge[0]} -> {edge[1]} ({edge[2]}): {str(e)}")
+    return created
+
+
+def validate_pattern(pattern) -> Optional[str]:
+    """Return why a pattern can't be ingested, or None if it can."""
+    if not isinstance(pattern, dict):
+        return "pattern is not an object"
+    if not pattern.get("id"):
+        return 'missing "id"'
+    if not isinstance(pattern.get("content"), str) or not pattern["content"]:
+        return 'missing "content"'
+    if not isinstance(pattern.get("metadata") or {}, dict):
+        return '"metadata" is not an object'
+    return None
+
+
+def _pattern_id(pattern) -> str:
+    """Pattern id for progress/error messages, even for invalid patterns."""
+    return pattern.get("id", "unknown") if isinstance(pattern, dict) else "unknown"
+
+
+def _ingest_patterns(
+    rag: RAGStore,
+    namespace: str,
+    patterns: list[dict],
+    embedding_cache: dict,
+) -> list[str]:
+    """Embed and upsert validated patterns, returning document IDs in order."""
+    metadatas = [pattern.get("metadata") or {} for pattern in patterns]
+    return ingest_many(
+        rag,
+        namespace,
+        [pattern["id"] for pattern in patterns],
+        [pattern["content"] for pattern in patterns],
+        [metadata.get("source") for metadata in metadatas],
+        [metadata.get("type") for metadata in metadatas],
+        embedding_cache,
+    )
+
+
+def _ingest_batch(
+    rag: RAGStore,
+    namespace: str,
+    batch: list,
+    embedding_cache: dict,
+) -> list[tuple[str, Optional[str], Optional[str]]]:
+    """
+    Ingest one batch of patterns with a single embed + upsert.
+
+    Invalid patterns are reported without being sent. A pattern id repeated
+    within the batch keeps its last occurrence, since one upsert can't
+    update the same row twice. If the batched call still fails, each
+    pattern is retried on its own so one bad row doesn't fail the rest.
+
+    Returns:
+        (pattern_id, document_id, error) per pattern; document_id is None
+        when error is set
+    """
+    outcomes = []
+    valid = {}
+    for pattern in batch:
+        problem = validate_pattern(pattern)
+        if problem:
+            outcomes.append((_pattern_id(pattern), None, problem))
+            continue
+        if pattern["id"] in valid:
+            print(f"   ⚠️  Duplicate pattern id {pattern['id']} in batch, keeping the last one")
+            del valid[pattern["id"]]
+        valid[pattern["id"]] = pattern
+
+    def _try(patterns: list[dict]) -> Optional[Exception]:
+        try:
+            doc_ids = _ingest_patterns(rag, namespace, patterns, embedding_cache)
+        except Exception as e:
+            return e
+        for index, pattern in enumerate(patterns):
+            doc_id = doc_ids[index] if index < len(doc_ids) else None
+            outcomes.append((pattern["id"], doc_id, None if doc_id else "No ID returned"))
+        return None
+
+    patterns = list(valid.values())
+    if patterns and (error := _try(patterns)) is not None:
+        if len(patterns) == 1:
+            outcomes.append((patterns[0]["id"], None, str(error)))
+        else:
+            print(f"   ⚠️  Batch of {len(patterns)} failed ({error}), retrying one by one")
+            for pattern in patterns:
+                if (pattern_error := _try([pattern])) is not None:
+                    outcomes.append((pattern["id"], None, str(pattern_error)))
+    return outcomes
+
+
+async def ingest_batches_async(
+    rag: RAGStore,
+    namespace: str,
+    batches: Iterable[list[dict]],
+    concurrency: int = INGEST_CONCURRENCY,
+) -> list[list[tuple[str, Optional[str], Optional[str]]]]:
+    """
+    Ingest pattern batches concurrently.
+
+    Embedding and insert calls are blocking network I/O, so each batch runs
+    in a worker thread. The semaphore is acquired before the next batch is
+    pulled from `batches`, so a streaming source is only read ahead by
+    `concurrency` batches. Embeddings are shared across batches by content
+    hash.
+
+    Returns:
+        (pattern_id, document_id, error) per pattern, one list per batch,
+        in source order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    embedding_cache = {}
+
+    async def _do_batch(batch: list[dict]) -> list[tuple[str, Optional[str], Optional[str]]]:
+        try:
+            return await asyncio.to_thread(
+                _ingest_batch, rag, namespace, batch, embedding_cache
+            )
+        except Exception as e:
+            return [(_pattern_id(pattern), None, str(e)) for pattern in batch]
+        finally:
+            semaphore.release()
+
+    tasks = []
+    for batch in batches:
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(_do_batch(batch)))
+    return await asyncio.gather(*tasks)
+
+
+def read_namespace(json_path: str) -> Optional[str]:
+    """
+    Read the top-level "namespace" field without parsing the patterns.
+
+    Stops at the first matching event, so files that declare the namespace
+    before the patterns array are barely read.
+    """
+    with open(json_path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f):
+            if prefix == "namespace" and event == "string":
+                return value
+    return None
+
+
+def iter_patterns(json_path: str) -> Iterator[dict]:
+    """Stream patterns from the JSON file one at a time."""
+    with open(json_path, 'rb') as f:
+        yield from ijson.items(f, 'patterns.item', use_float=True)
+
+
+def _batched(items: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    """Yield lists of up to `size` items."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
 
 def ingest_from_json(
     json_path: str,
     namespace_override: Optional[str] = None,
     dry_run: bool = False,
+    concurrency: int = INGEST_CONCURRENCY,
 ) -> dict:
     """
     Ingest patterns from JSON file into knowledge base.
@@ -35,29 +363,28 @@ def ingest_from_json(
         json_path: Path to JSON file with patterns
         namespace_override: Override namespace from JSON
         dry_run: If True, show what would be ingested without actually doing it
+        concurrency: Number of Phase 1 batches in flight at once
     
     Returns:
-        Statistics about ingestion
+        Statistics about ingestion, including the resolved namespace
     """
-    # Load JSON
-    with open(json_path, 'r') as f:
-        data = json.load(f)
-    
-    namespace = namespace_override or data.get("namespace", "remotion_execution_patterns")
-    patterns = data.get("patterns", [])
+    namespace = namespace_override or read_namespace(json_path) or DEFAULT_NAMESPACE
     
     print(f"\n{'='*60}")
     print(f"RAG Knowledge Ingestion")
     print(f"{'='*60}")
     print(f"Source: {json_path}")
     print(f"Namespace: {namespace}")
-    print(f"Patterns: {len(patterns)}")
     print(f"Mode: {'DRY RUN' if dry_run else 'LIVE'}")
     print(f"{'='*60}\n")
     
     if dry_run:
         print("Dry run - showing what would be ingested:\n")
-        for i, pattern in enumerate(patterns, 1):
+        for i, pattern in enumerate(iter_patterns(json_path), 1):
+            problem = validate_pattern(pattern)
+            if problem:
+                print(f"{i}. {_pattern_id(pattern)} - ✗ {problem}\n")
+                continue
             print(f"{i}. {pattern['id']}")
             print(f"   Content length: {len(pattern['content'])} chars")
             print(f"   Metadata: {pattern.get('metadata', {})}")
@@ -66,6 +393,7 @@ def ingest_from_json(
         return {
             "ingested": 0,
             "relations": 0,
+            "namespace": namespace,
             "dry_run": True,
         }
     
@@ -77,69 +405,80 @@ def ingest_from_json(
     stats = {
         "ingested": 0,
         "relations": 0,
+        "namespace": namespace,
         "errors": [],
     }
     
-    # Phase 1: Ingest all patterns
+    # Phase 2 only needs (pattern_id, relations) for patterns that have edges;
+    # contents are dropped with each batch
+    with_relations = []
+
+    def _stream_batches() -> Iterator[list[dict]]:
+        for batch in _batched(iter_patterns(json_path), INGEST_BATCH_SIZE):
+            with_relations.extend(
+                (pattern["id"], pattern["relations"])
+                for pattern in batch
+                if isinstance(pattern, dict) and pattern.get("id") and pattern.get("relations")
+            )
+            yield batch
+
+    # Phase 1: Ingest all patterns (streamed, batched embeddings + bulk insert)
     print("Phase 1: Ingesting patterns...")
-    for i, pattern in enumerate(patterns, 1):
-        try:
-            pattern_id = pattern["id"]
-            content = pattern["content"]
-            metadata = pattern.get("metadata", {})
-
-            # Extract source and type from metadata
-            source = metadata.get("source")
-            type_value = metadata.get("type")
-
-            # Ingest (RAGStore.ingest accepts source and type as separate params)
-            result = rag.ingest(content, source=source, type=type_value)
-            
-            # Store mapping
-            if result and "id" in result:
-                id_map[pattern_id] = result["id"]
-                stats["ingested"] += 1
-                print(f"   ✓ [{i}/{len(patterns)}] {pattern_id}")
-            else:
-                stats["errors"].append(f"Failed to ingest {pattern_id}: No ID returned")
-                print(f"   ✗ [{i}/{len(patterns)}] {pattern_id} - No ID returned")
-        
-        except Exception as e:
-            stats["errors"].append(f"Error ingesting {pattern.get('id', 'unknown')}: {str(e)}")
-            print(f"   ✗ [{i}/{len(patterns)}] {pattern.get('id', 'unknown')} - {e}")
+    results = asyncio.run(ingest_batches_async(rag, namespace, _stream_batches(), concurrency))
+
+    total = sum(len(outcomes) for outcomes in results)
+    i = 0
+    for outcomes in results:
+        # Store mapping (one progress line per batch, failures listed individually)
+        ingested = 0
+        for pattern_id, doc_id, error in outcomes:
+            i += 1
+            if error is not None:
+                stats["errors"].append(f"Error ingesting {pattern_id}: {error}")
+                print(f"   ✗ [{i}] {pattern_id} - {error}")
+                continue
+            id_map[pattern_id] = doc_id
+            ingested += 1
+
+        stats["ingested"] += ingested
+        if ingested:
+            print(f"   ✓ [{i}] +{ingested} patterns")
     
-    print(f"\n✓ Ingested {stats['ingested']}/{len(patterns)} patterns")
+    print(f"\n✓ Ingested {stats['ingested']}/{total} patterns")
     
-    # Phase 2: Create relationships
+    # Phase 2: Create relationships (collected, then bulk inserted)
     print("\nPhase 2: Creating relationships...")
-    for pattern in patterns:
-        pattern_id = pattern["id"]
-        
-        if pattern_id not in id_map:
+
+    pending_edges = []
+    missing = set()
+    for pattern_id, relations in with_relations:
+        from_uuid = id_map.get(pattern_id)
+        if from_uuid is None:
             continue  # Skip if pattern wasn't ingested
-        
-        from_uuid = id_map[pattern_id]
-        relations = pattern.get("relations", [])
+        if not isinstance(relations, list):
+            stats["errors"].append(f"Invalid relations on {pattern_id}: expected a list")
+            continue
         
         for relation in relations:
-            try:
-                to_id = relation["to_id"]
-                relation_type = relation["relation_type"]
-                
-                if to_id not in id_map:
-                    stats["errors"].append(f"Relation target not found: {pattern_id} -> {to_id}")
-                    continue
-                
-                to_uuid = id_map[to_id]
-                
-                # Add relation
-                rag.add_relation(from_uuid, to_uuid, relation_type)
-                stats["relations"] += 1
-                print(f"   ✓ {pattern_id} --[{relation_type}]--> {to_id}")
-            
-            except Exception as e:
-                stats["errors"].append(f"Error creating relation {pattern_id} -> {relation.get('to_id')}: {str(e)}")
-                print(f"   ✗ {pattern_id} -> {relation.get('to_id')} - {e}")
+            if not isinstance(relation, dict) or not relation.get("to_id") or not relation.get("relation_type"):
+                stats["errors"].append(f"Invalid relation on {pattern_id}: {relation!r} needs to_id and relation_type")
+                continue
+
+            to_uuid = id_map.get(relation["to_id"])
+            if to_uuid is None:
+                missing.add(relation["to_id"])
+                continue
+
+            pending_edges.append((from_uuid, to_uuid, relation["relation_type"]))
+
+    # Missing targets are reported once, not per relation
+    if missing:
+        preview = sorted(str(to_id) for to_id in missing)[:10]
+        more = "..." if len(missing) > len(preview) else ""
+        stats["errors"].append(f"{len(missing)} relation targets missing: {preview}{more}")
+
+    if pending_edges:
+        stats["relations"] = add_relations_bulk(rag, namespace, pending_edges, errors=stats["errors"])
     
     print(f"\n✓ Created {stats['relations']} relationships")
     
@@ -147,7 +486,7 @@ def ingest_from_json(
     print(f"\n{'='*60}")
     print(f"Ingestion Complete")
     print(f"{'='*60}")
-    print(f"Patterns ingested: {stats['ingested']}/{len(patterns)}")
+    print(f"Patterns ingested: {stats['ingested']}/{total}")
     print(f"Relations created: {stats['relations']}")
     print(f"Errors: {len(stats['errors'])}")
     
@@ -205,31 +544,16 @@ def list_namespaces() -> list[dict]:
     print(f"Available Namespaces")
     print(f"{'='*60}\n")
 
-    # Get all unique namespaces from documents table
+    # Counts are aggregated server-side (migration 009_list_namespace_stats.sql)
     rag = RAGStore()
-    result = rag.client.table("documents").select("namespace").execute()
+    result = rag.client.rpc("list_namespace_stats").execute()
 
     if not result.data:
         print("No namespaces found.")
         return []
 
-    # Count documents and relations per namespace
-    namespaces = {}
-    for row in result.data:
-        ns = row["namespace"]
-        if ns not in namespaces:
-            namespaces[ns] = {"namespace": ns, "documents": 0, "relations": 0}
-        namespaces[ns]["documents"] += 1
-
-    # Get relations count
-    rel_result = rag.client.table("doc_relations").select("namespace").execute()
-    for row in rel_result.data:
-        ns = row["namespace"]
-        if ns in namespaces:
-            namespaces[ns]["relations"] += 1
-
     # Display
-    namespace_list = sorted(namespaces.values(), key=lambda x: x["namespace"])
+    namespace_list = result.data
     for ns_info in namespace_list:
         print(f"  {ns_info['namespace']}")
         print(f"    Documents: {ns_info['documents']}")
@@ -332,6 +656,7 @@ Examples:
     parser.add_argument("--dry-run", action="store_true", help="Preview without ingesting")
     parser.add_argument("--test", metavar="QUERY", help="Test search after ingestion")
     parser.add_argument("--match-count", type=int, default=3, help="Results for test query")
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY, help="Ingest batches in flight at once")
     parser.add_argument("--list", action="store_true", help="List all namespaces")
     parser.add_argument("--clear", action="store_true", help="Clear all data in namespace")
     parser.add_argument("--yes", action="store_true", help="Skip confirmation for --clear")
@@ -366,16 +691,12 @@ Examples:
         args.json_file,
         namespace_override=args.namespace,
         dry_run=args.dry_run,
+        concurrency=args.concurrency,
     )
 
     # Test search if requested
     if args.test and not args.dry_run:
-        # Load namespace from JSON if not overridden
-        with open(args.json_file, 'r') as f:
-            data = json.load(f)
-        namespace = args.namespace or data.get("namespace", "remotion_execution_patterns")
-
-        test_search(namespace, args.test, args.match_count)
+        test_search(stats["namespace"], args.test, args.match_count)
 
     # Exit code based on errors
     if stats.get("errors"):
@@ -4,6 +4,7 @@ Debug script to check what was actually captured in the last video project
 """
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -29,7 +30,12 @@ def main():
     print()
     
     # Get all capture tasks
-    tasks = client.table('capture_tasks').select('*').eq('video_project_id', project_id).execute()
+    tasks = (
+        client.table('capture_tasks')
+        .select('id,capture_type,task_description,status,asset_path,validation_notes')
+        .eq('video_project_id', project_id)
+        .execute()
+    )
     
     print(f"Total capture tasks: {len(tasks.data)}")
     print("=" * 80)
@@ -54,8 +60,11 @@ def main():
             unique_assets.add(task['asset_path'])
     
     print(f"\nUnique asset paths in database: {len(unique_assets)}")
-    for path in sorted(unique_assets):
-        exists = os.path.exists(path) if path else False
+    paths = sorted(unique_assets)
+    # stat calls are independent; run them in parallel for networked storage
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        exists_flags = list(executor.map(os.path.exists, paths))
+    for path, exists in zip(paths, exists_flags):
         print(f"  {'✓' if exists else '✗'} {path}")
 
 if __name__ == '__main__':
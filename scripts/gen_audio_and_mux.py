@@ -1,12 +1,43 @@
 #!/usr/bin/env python3
 """生成音频并与视频混合"""
+import json
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from editor.music_cache import analysis_cache_key, load_cached_analysis, save_cached_analysis
 from tools.music_generator import music_generator_node, mux_audio_video_node
 
+
+def load_music_analysis(video_project_id: str) -> dict:
+    """
+    分析时间线（带缓存）
+
+    缓存键为 clip_tasks 行内容 + 分析版本的哈希，时间线与分析代码都未变化时直接复用上次的分析结果。
+    """
+    from editor.core.music_planner import (
+        MUSIC_ANALYSIS_VERSION,
+        load_composed_clip_tasks,
+        analyze_clip_tasks_for_music,
+    )
+
+    clip_tasks = load_composed_clip_tasks(video_project_id)
+    key = analysis_cache_key(
+        MUSIC_ANALYSIS_VERSION,
+        json.dumps(clip_tasks, sort_keys=True, default=str).encode(),
+    )
+
+    analysis = load_cached_analysis(video_project_id, "timeline", key)
+    if analysis is not None:
+        print("   ♻️  复用缓存的音乐分析")
+        return analysis
+
+    analysis = analyze_clip_tasks_for_music(clip_tasks)
+    save_cached_analysis(video_project_id, "timeline", key, analysis)
+    return analysis
+
+
 if __name__ == "__main__":
     video_project_id = "67ab3ee1-ab2a-4dec-8f3e-241f957fd8a9"
     render_path = f"/Users/tk/Desktop/productvideo/assets/renders/{video_project_id}.mp4"
@@ -19,8 +50,7 @@ if __name__ == "__main__":
     }
 
     # 先加载 music_analysis
-    from editor.music_planner import analyze_timeline_for_music
-    state["music_analysis"] = analyze_timeline_for_music(video_project_id)
+    state["music_analysis"] = load_music_analysis(video_project_id)
 
     # 生成音频
     result = music_generator_node(state)
@@ -16,6 +16,20 @@ V2_DIR = SRC_EDITOR_DIR / "v2"
 FILES = ["planner.py", "clip_composer.py", "graph.py"]
 
 
+def copy_into_place(source_path: Path, target_path: Path):
+    """
+    Atomically replace target_path with a copy of source_path.
+
+    Copies to a temp name and os.replace()s it over the target, so the
+    target is never half-written. A copy (not a hardlink) keeps the v1/ and
+    v2/ sources separate from the active file, so editing the active file
+    can't change them.
+    """
+    tmp_path = target_path.with_suffix(target_path.suffix + ".tmp")
+    shutil.copy2(source_path, tmp_path)
+    os.replace(tmp_path, target_path)
+
+
 def install_v2():
     """Install V2 files from v2/ to active location."""
     print("\n🚀 Installing V2 files...")
@@ -25,7 +39,7 @@ def install_v2():
         target_path = SRC_EDITOR_DIR / filename
 
         if v2_path.exists():
-            shutil.copy2(v2_path, target_path)
+            copy_into_place(v2_path, target_path)
             print(f"   ✓ Installed v2/{filename} → {filename}")
         else:
             print(f"   ❌ v2/{filename} not found")
@@ -40,7 +54,7 @@ def restore_v1():
         target_path = SRC_EDITOR_DIR / filename
 
         if v1_path.exists():
-            shutil.copy2(v1_path, target_path)
+            copy_into_place(v1_path, target_path)
             print(f"   ✓ Restored v1/{filename} → {filename}")
         else:
             print(f"   ⚠️  v1/{filename} not found")
@@ -3,30 +3,31 @@
 重新生成音乐并混合到已渲染的视频
 
 用法:
-    python scripts/regenerate_music_and_mux.py <video_project_id>
+    python scripts/regenerate_music_and_mux.py <video_project_id> [<video_project_id> ...]
 
 示例:
     python scripts/regenerate_music_and_mux.py a8beb3c2-01a6-4480-b37f-30fdc56c4e7b
+
+传入多个 ID 时，各项目在同一个事件循环中并发处理（音乐生成与 FFmpeg 混合互相重叠）。
 """
 import sys
 import os
-import json
-import subprocess
+import asyncio
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+import orjson
+
 # 添加项目根目录到 Python 路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / "src"))
 
 
-def load_env_variable(key: str) -> str:
-    """从 .env 文件读取环境变量"""
-    # 先尝试系统环境变量
-    value = os.getenv(key)
-    if value:
-        return value
-
-    # 读取 .env 文件
+@lru_cache(maxsize=1)
+def _env_file_values() -> dict:
+    """解析一次 .env 文件并缓存结果"""
+    values = {}
     env_path = project_root / ".env"
     if env_path.exists():
         with open(env_path) as f:
@@ -34,64 +35,99 @@ def load_env_variable(key: str) -> str:
                 line = line.strip()
                 if line and not line.startswith('#') and '=' in line:
                     env_key, env_value = line.split('=', 1)
-                    if env_key.strip() == key:
-                        # 移除引号
-                        return env_value.strip().strip('"').strip("'")
-    return None
+                    # 移除引号
+                    values[env_key.strip()] = env_value.strip().strip('"').strip("'")
+    return values
+
+
+def load_env_variable(key: str) -> str:
+    """从 .env 文件读取环境变量"""
+    # 先尝试系统环境变量
+    return os.getenv(key) or _env_file_values().get(key)
+
+
+def debug_enabled() -> bool:
+    """DEBUG=1 时打印完整堆栈（与 src/config.py 的判定一致）"""
+    return (load_env_variable("DEBUG") or "").lower() in ("1", "true", "yes")
+
+
+# _analyze_spec 输出格式变化时递增（使旧缓存失效）
+SPEC_ANALYSIS_VERSION = 2
 
 
 def analyze_timeline_for_music_simple(video_project_id: str) -> dict:
-    """简化版的时间线分析，直接从 video_spec 读取"""
+    """简化版的时间线分析，直接从 video_spec 读取（结果按 spec 内容 + 分析版本缓存）"""
+    from editor.music_cache import analysis_cache_key, load_cached_analysis, save_cached_analysis
+
     spec_path = project_root / "assets" / "specs" / f"{video_project_id}.json"
+    spec_bytes = spec_path.read_bytes()
+
+    key = analysis_cache_key(SPEC_ANALYSIS_VERSION, spec_bytes)
+    analysis = load_cached_analysis(video_project_id, "spec", key)
+    if analysis is not None:
+        return analysis
 
-    with open(spec_path, "r") as f:
-        spec = json.load(f)
+    analysis = _analyze_spec(orjson.loads(spec_bytes))
+    save_cached_analysis(video_project_id, "spec", key, analysis)
+    return analysis
 
+
+def _analyze_spec(spec: dict) -> dict:
+    """从已解析的 VideoSpec 计算 hit points / sections / composition plan"""
     meta = spec.get("meta", {})
     clips = spec.get("clips", [])
     fps = meta.get("fps", 30)
     total_frames = meta.get("durationFrames", 0)
     total_duration_s = total_frames / fps
 
-    # 简单的 hit points 提取
-    hit_points = []
-    for clip in clips:
-        start_frame = clip.get("startFrame", 0)
-        duration_frames = clip.get("durationFrames", 0)
-        start_s = start_frame / fps
-        duration_s = duration_frames / fps
-
-        # 提取文本内容
-        layers = clip.get("layers", [])
-        text_content = ""
-        for layer in layers:
-            if layer.get("type") == "text":
-                text_content = layer.get("content", "")
-                break
-
-        # 简单的能量推断
-        energy = "medium"
-        if start_s == 0 or start_s >= total_duration_s - 2:
-            energy = "impact"
-        elif duration_s < 1.0:
-            energy = "high"
-
-        hit_points.append({
-            "time_s": start_s,
-            "duration_s": duration_s,
+    # 简单的 hit points 提取（时间与能量一次性向量化计算）
+    starts = np.fromiter((c.get("startFrame", 0) for c in clips), dtype=np.float64, count=len(clips))
+    durations = np.fromiter((c.get("durationFrames", 0) for c in clips), dtype=np.float64, count=len(clips))
+    start_s = starts / fps
+    duration_s = durations / fps
+
+    # 简单的能量推断
+    energies = np.where(
+        (start_s == 0) | (start_s >= total_duration_s - 2),
+        "impact",
+        np.where(duration_s < 1.0, "high", "medium"),
+    )
+
+    # 提取文本内容（每个 clip 的第一个文本层）
+    descriptions = [
+        next((layer.get("content", "") for layer in clip.get("layers", []) if layer.get("type") == "text"), "")[:50]
+        for clip in clips
+    ]
+
+    hit_points = [
+        {
+            "time_s": t,
+            "duration_s": d,
             "energy": energy,
-            "description": text_content[:50],
-        })
-
-    # 简单的 sections 分组
-    sections = []
-    section_duration_ms = int(total_duration_s * 1000 / 5)  # 分成5段
-    for i in range(5):
-        sections.append({
+            "description": description,
+        }
+        for t, d, energy, description in zip(
+            start_s.tolist(), duration_s.tolist(), energies.tolist(), descriptions
+        )
+    ]
+
+    # sections 分组：最多 5 段，段数按最小时长收紧（ElevenLabs 要求每个 section >= 3000ms）
+    MAX_SECTIONS = 5
+    MIN_SECTION_DURATION = 3000
+    total_ms = int(total_duration_s * 1000)
+    n_sections = max(1, min(MAX_SECTIONS, total_ms // MIN_SECTION_DURATION))
+    section_duration_ms = total_ms // n_sections
+    # 余数并入最后一段，使各段之和等于视频总时长
+    last_duration_ms = total_ms - section_duration_ms * (n_sections - 1)
+
+    sections = [
+        {
             "name": f"Section {i+1}",
-            "duration_ms": section_duration_ms,
+            "duration_ms": last_duration_ms if i == n_sections - 1 else section_duration_ms,
             "energy": "medium",
-        })
+        }
+        for i in range(n_sections)
+    ]
 
     # 生成基础 composition plan
     composition_plan = {
@@ -109,44 +145,8 @@ def analyze_timeline_for_music_simple(video_project_id: str) -> dict:
         ]
     }
 
-    # 合并短 sections（ElevenLabs 要求每个 section >= 3000ms）
-    MIN_SECTION_DURATION = 3000
-    merged_sections = []
-    buffer = None
-
-    for section in composition_plan["sections"]:
-        if buffer:
-            section = {
-                "section_name": f"{buffer['section_name']} + {section['section_name']}",
-                "duration_ms": buffer["duration_ms"] + section["duration_ms"],
-                "positive_local_styles": buffer["positive_local_styles"] + section["positive_local_styles"],
-                "negative_local_styles": buffer["negative_local_styles"] + section["negative_local_styles"],
-                "lines": []
-            }
-            buffer = None
-
-        if section["duration_ms"] < MIN_SECTION_DURATION:
-            buffer = section
-        else:
-            merged_sections.append(section)
-
-    if buffer:
-        if merged_sections:
-            last = merged_sections[-1]
-            merged_sections[-1] = {
-                "section_name": f"{last['section_name']} + {buffer['section_name']}",
-                "duration_ms": last["duration_ms"] + buffer["duration_ms"],
-                "positive_local_styles": last["positive_local_styles"] + buffer["positive_local_styles"],
-                "negative_local_styles": last["negative_local_styles"] + buffer["negative_local_styles"],
-                "lines": []
-            }
-        else:
-            merged_sections.append(buffer)
-
-    composition_plan["sections"] = merged_sections
-
     return {
-        "total_duration_ms": int(total_duration_s * 1000),
+        "total_duration_ms": total_ms,
         "clip_density": len(clips) / total_duration_s,
         "energy_curve": "medium",
         "recommended_tempo": 115,
@@ -156,10 +156,15 @@ def analyze_timeline_for_music_simple(video_project_id: str) -> dict:
     }
 
 
-def generate_music_with_elevenlabs(composition_plan: dict, output_path: Path) -> bool:
-    """使用 ElevenLabs 生成音乐"""
+# 音频流写入缓冲大小
+AUDIO_WRITE_BUFFER = 1 << 20
+
+
+async def generate_music_with_elevenlabs(composition_plan: dict, output_path: Path) -> bool:
+    """使用 ElevenLabs 生成音乐（异步流式写入）"""
     try:
-        from elevenlabs.client import ElevenLabs
+        import aiofiles
+        from elevenlabs.client import AsyncElevenLabs
 
         api_key = load_env_variable("ELEVENLABS_API_KEY")
         if not api_key:
@@ -167,64 +172,55 @@ def generate_music_with_elevenlabs(composition_plan: dict, output_path: Path) ->
             return False
 
         print("   🎹 使用 ElevenLabs 生成音频...")
-        client = ElevenLabs(api_key=api_key)
+        client = AsyncElevenLabs(api_key=api_key)
 
         track = client.music.compose(
             composition_plan=composition_plan,
             respect_sections_durations=True,
         )
 
-        with open(output_path, "wb") as f:
-            for chunk in track:
-                f.write(chunk)
+        # 1MB 写缓冲：流式 chunk 合并成少量大块写入
+        async with aiofiles.open(output_path, "wb", buffering=AUDIO_WRITE_BUFFER) as f:
+            async for chunk in track:
+                await f.write(chunk)
 
         print(f"   ✓ 音乐生成成功: {output_path}")
         return True
     except Exception as e:
-        print(f"   ❌ 音乐生成失败: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"   ❌ 音乐生成失败: {e!r}")
+        # 完整堆栈只在 DEBUG 模式下打印（批量重试时避免反复格式化 traceback）
+        if debug_enabled():
+            import traceback
+            traceback.print_exc()
         return False
 
 
-def mux_audio_video_ffmpeg(video_path: Path, audio_path: Path, output_path: Path) -> bool:
-    """使用 FFmpeg 混合音视频"""
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", str(video_path),
-        "-i", str(audio_path),
-        "-map", "0:v:0",
-        "-map", "1:a:0",
-        "-c:v", "copy",
-        "-c:a", "aac",
-        "-b:a", "192k",
-        "-shortest",
-        str(output_path)
-    ]
+def max_concurrent_mux(project_count: int) -> int:
+    """同时运行的 FFmpeg 进程上限（总线程数 ≈ CPU 核数）"""
+    from editor.muxer import FFMPEG_THREADS
 
-    try:
-        print("   📀 运行 FFmpeg...")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-
-        if result.returncode == 0:
-            print(f"   ✓ 混合成功: {output_path}")
-            return True
-        else:
-            print(f"   ❌ FFmpeg 错误: {result.stderr[:500]}")
-            return False
-    except Exception as e:
-        print(f"   ❌ 混合失败: {e}")
-        return False
+    return max(1, min(project_count, (os.cpu_count() or 2) // FFMPEG_THREADS))
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("❌ 缺少参数: video_project_id")
-        print(f"\n用法: python {sys.argv[0]} <video_project_id>")
-        sys.exit(1)
+async def mux_audio_video_ffmpeg(
+    video_path: Path, audio_path: Path, output_path: Path, duration_s: float
+) -> bool:
+    """使用 FFmpeg 混合音视频（见 editor/muxer.py），输出按 VideoSpec 时长截断"""
+    # editor 包会连带导入 LangGraph，用到时再导入
+    from editor.muxer import mux_async
+
+    print("   📀 运行 FFmpeg...")
+    success, error = await mux_async(video_path, audio_path, output_path, duration_s=duration_s)
 
-    video_project_id = sys.argv[1]
+    if success:
+        print(f"   ✓ 混合成功: {output_path}")
+    else:
+        print(f"   ❌ FFmpeg 错误: {error[-500:]}")
+    return success
 
+
+async def process_project(video_project_id: str, mux_semaphore: asyncio.Semaphore) -> bool:
+    """处理单个项目：分析 → 生成音乐 → 混合，成功返回 True"""
     print(f"\n{'='*60}")
     print(f"重新生成音乐并混合到视频")
     print(f"{'='*60}")
@@ -236,18 +232,16 @@ def main():
 
     if not spec_path.exists():
         print(f"❌ VideoSpec 不存在: {spec_path}")
-        sys.exit(1)
+        return False
     if not render_path.exists():
         print(f"❌ 视频文件不存在: {render_path}")
-        sys.exit(1)
+        return False
 
     print(f"✓ VideoSpec: {spec_path}")
     print(f"✓ 渲染视频: {render_path}")
 
     # 步骤 1: 分析时间线
-    print(f"\n{'='*60}")
-    print("步骤 1: 分析视频时间线")
-    print(f"{'='*60}")
+    print(f"\n[{video_project_id}] 步骤 1: 分析视频时间线")
 
     try:
         music_analysis = analyze_timeline_for_music_simple(video_project_id)
@@ -256,34 +250,58 @@ def main():
         print(f"   ✓ 音乐段落: {len(music_analysis['sections'])}")
     except Exception as e:
         print(f"\n❌ 分析失败: {e}")
-        sys.exit(1)
+        return False
 
     # 步骤 2: 生成音乐
-    print(f"\n{'='*60}")
-    print("步骤 2: 生成背景音乐")
-    print(f"{'='*60}")
+    print(f"\n[{video_project_id}] 步骤 2: 生成背景音乐")
 
     audio_dir = project_root / "assets" / "audio"
     audio_dir.mkdir(parents=True, exist_ok=True)
     audio_path = audio_dir / f"{video_project_id}_bgm.mp3"
 
-    if not generate_music_with_elevenlabs(music_analysis["composition_plan"], audio_path):
-        sys.exit(1)
+    if not await generate_music_with_elevenlabs(music_analysis["composition_plan"], audio_path):
+        return False
 
-    # 步骤 3: 混合音视频
-    print(f"\n{'='*60}")
-    print("步骤 3: 混合音频和视频")
-    print(f"{'='*60}")
+    # 步骤 3: 混合音视频（限制并发 FFmpeg 数量）
+    print(f"\n[{video_project_id}] 步骤 3: 混合音频和视频")
 
     output_path = render_path.parent / f"{render_path.stem}_with_audio{render_path.suffix}"
 
-    if not mux_audio_video_ffmpeg(render_path, audio_path, output_path):
+    async with mux_semaphore:
+        duration_s = music_analysis["total_duration_ms"] / 1000
+        if not await mux_audio_video_ffmpeg(render_path, audio_path, output_path, duration_s):
+            return False
+
+    print(f"\n✅ [{video_project_id}] 完成! 最终视频 (带音乐): {output_path}\n")
+    return True
+
+
+async def process_projects(video_project_ids: list[str]) -> list:
+    """并发处理多个项目"""
+    mux_semaphore = asyncio.Semaphore(max_concurrent_mux(len(video_project_ids)))
+    return await asyncio.gather(
+        *[process_project(pid, mux_semaphore) for pid in video_project_ids],
+        return_exceptions=True,
+    )
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("❌ 缺少参数: video_project_id")
+        print(f"\n用法: python {sys.argv[0]} <video_project_id> [<video_project_id> ...]")
         sys.exit(1)
 
-    print(f"\n{'='*60}")
-    print("✅ 完成!")
-    print(f"{'='*60}")
-    print(f"\n🎬 最终视频 (带音乐): {output_path}\n")
+    video_project_ids = sys.argv[1:]
+    results = asyncio.run(process_projects(video_project_ids))
+
+    failed = [pid for pid, ok in zip(video_project_ids, results) if ok is not True]
+    for pid, ok in zip(video_project_ids, results):
+        if isinstance(ok, Exception):
+            print(f"❌ [{pid}] {ok}")
+
+    if failed:
+        print(f"\n❌ {len(failed)}/{len(video_project_ids)} 个项目失败: {', '.join(failed)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -23,11 +23,11 @@ import sys
 import os
 import uuid
 import json
+from typing import Optional
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from db.supabase_client import get_client
 from pathlib import Path
 
 
@@ -57,6 +57,8 @@ def create_test_project(config_name: str = "begin") -> str:
 
     Returns the project ID.
     """
+    from db.supabase_client import get_client
+
     client = get_client()
     project_id = str(uuid.uuid4())
 
@@ -88,16 +90,23 @@ def create_test_project(config_name: str = "begin") -> str:
     return project_id
 
 
-def cleanup_project(project_id: str):
-    """Clean up all DB entries for a project."""
+def cleanup_project(project_id: str, tables: Optional[set[str]] = None):
+    """
+    Clean up DB entries for a project.
+
+    tables: child tables written during this run (session.touched_tables).
+            None clears every child table.
+    """
+    from db.supabase_client import get_client
+
     client = get_client()
     
-    # Delete in order (foreign keys)
-    client.table("generated_assets").delete().eq("video_project_id", project_id).execute()
-    client.table("clip_tasks").delete().eq("video_project_id", project_id).execute()
-    client.table("capture_tasks").delete().eq("video_project_id", project_id).execute()
-    client.table("video_specs").delete().eq("video_project_id", project_id).execute()
-    client.table("video_projects").delete().eq("id", project_id).execute()
+    # Single RPC deletes children then the project in one transaction
+    # (see migrations/013_cleanup_video_project_tables.sql)
+    params = {"pid": project_id}
+    if tables is not None:
+        params["tables"] = sorted(tables)
+    client.rpc("cleanup_video_project", params).execute()
     
     print(f"✓ Cleaned up project {project_id}")
 
@@ -160,8 +169,9 @@ def main():
     if elevenlabs_ok:
         print("✓ ElevenLabs API key found")
     
-    # Check Supabase connection
+    # Check Supabase connection (imported here so early exits stay fast)
     try:
+        from db.supabase_client import get_client
         client = get_client()
         print("✓ Supabase connection OK")
     except Exception as e:
@@ -225,7 +235,7 @@ def main():
         print("\n" + "-" * 60)
         response = input("Delete test project from DB? [y/N]: ").strip().lower()
         if response == 'y':
-            cleanup_project(project_id)
+            cleanup_project(project_id, session.touched_tables)
         else:
             print(f"\n📦 Project kept. ID: {project_id}")
             print(f"   Run again: python -m src.main --phase editor --project-id {project_id}")
@@ -234,16 +244,18 @@ def main():
         # Handled by signal handler in main.py
         pass
     except Exception as e:
-        print(f"\n❌ Error during editor phase: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"\n❌ Error during editor phase: {e!r}")
+        from config import Config
+        if Config.DEBUG:
+            import traceback
+            traceback.print_exc()
         
         # Still offer cleanup
         if project_id:
             print("\n" + "-" * 60)
             response = input("Delete test project from DB? [y/N]: ").strip().lower()
             if response == 'y':
-                cleanup_project(project_id)
+                cleanup_project(project_id, session.touched_tables)
 
 
 if __name__ == "__main__":
@@ -15,10 +15,9 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / "src"))
 
-from editor.music_planner import analyze_timeline_for_music
+from editor.core.music_planner import analyze_timeline_for_music
+from editor.muxer import mux
 from tools.music_generator import MusicGenerator
-import subprocess
-import json
 
 VIDEO_PROJECT_ID = "f766c5a6-e77f-4b29-b637-a9479ee463ec"
 VIDEO_PATH = project_root / "assets/renders" / f"{VIDEO_PROJECT_ID}.mp4"
@@ -96,48 +95,22 @@ def main():
         print(f"   ❌ 音频文件不存在: {AUDIO_OUTPUT}")
         return 1
 
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", str(VIDEO_PATH),
-        "-i", str(AUDIO_OUTPUT),
-        "-map", "0:v:0",
-        "-map", "1:a:0",
-        "-c:v", "copy",
-        "-c:a", "aac",
-        "-b:a", "192k",
-        "-shortest",
-        str(FINAL_OUTPUT)
-    ]
+    success, error = mux(
+        VIDEO_PATH, AUDIO_OUTPUT, FINAL_OUTPUT,
+        duration_s=analysis["total_duration_ms"] / 1000,
+    )
 
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=120,
-        )
-
-        if result.returncode == 0:
-            print(f"   ✓ 混合成功: {FINAL_OUTPUT}")
-            print(f"\n{'='*60}")
-            print("✅ 测试完成！所有步骤都成功")
-            print(f"{'='*60}")
-            print(f"\n最终视频: {FINAL_OUTPUT}")
-            return 0
-        else:
-            print(f"   ❌ FFmpeg 错误: {result.stderr[:500]}")
-            return 1
-
-    except subprocess.TimeoutExpired:
-        print("   ❌ FFmpeg 超时")
-        return 1
-    except FileNotFoundError:
-        print("   ❌ FFmpeg 未安装，请运行: brew install ffmpeg")
-        return 1
-    except Exception as e:
-        print(f"   ❌ 混合失败: {e}")
+    if not success:
+        print(f"   ❌ FFmpeg 错误: {error[-500:]}")
         return 1
 
+    print(f"   ✓ 混合成功: {FINAL_OUTPUT}")
+    print(f"\n{'='*60}")
+    print("✅ 测试完成！所有步骤都成功")
+    print(f"{'='*60}")
+    print(f"\n最终视频: {FINAL_OUTPUT}")
+    return 0
+
 
 if __name__ == "__main__":
     sys.exit(main())
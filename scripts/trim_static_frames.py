@@ -12,11 +12,27 @@
 import cv2
 import numpy as np
 import subprocess
-import tempfile
+import itertools
 import os
+import queue
 import sys
+import threading
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Tuple, Optional
+
+from numpy.typing import ArrayLike
+
+
+# 帧差分析用的缩略尺寸：帧差均值对降采样不敏感，缩小后逐像素处理的数据量减少 50-100 倍
+DOWNSAMPLE_SIZE = (160, 90)
+
+# OpenCV 的 resize/norm 内部用 parallel_for_ 并行；留一半核给 FFmpeg 解码线程
+cv2.setNumThreads(max(1, (os.cpu_count() or 2) // 2))
+
+# 解码线程与帧差计算之间的缓冲帧数
+DECODE_QUEUE_SIZE = 4
+
+_END_OF_STREAM = object()
 
 
 def log(message: str) -> None:
@@ -24,222 +40,285 @@ def log(message: str) -> None:
     print(message, flush=True)
 
 
-def adaptive_threshold(video_path: str, percentile: float = 75) -> float:
+def open_capture(video_path: str) -> cv2.VideoCapture:
     """
-    根据视频整体差异分布自动确定阈值
+    打开视频，优先使用硬件解码（VideoToolbox / VAAPI / D3D11VA / NVDEC）
+
+    OpenCV 版本过旧或没有可用硬件解码器时退回默认的软件解码。
+    """
+    try:
+        cap = cv2.VideoCapture(
+            video_path,
+            cv2.CAP_FFMPEG,
+            [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY],
+        )
+    except (AttributeError, TypeError, cv2.error):
+        cap = None
+
+    if cap is None or not cap.isOpened():
+        cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频: {video_path}")
+    return cap
+
+
+def _put_unless_stopped(frames: queue.Queue, item, stop: threading.Event) -> bool:
+    """
+    向有界队列放入一项；消费端已退出（stop 已置位）时不再阻塞等待
+
+    Returns:
+        是否成功放入
+    """
+    while not stop.is_set():
+        try:
+            frames.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _decode_small_frames(cap: cv2.VideoCapture, frames: queue.Queue, stop: threading.Event) -> None:
+    """
+    解码线程：读帧 → 缩略 → 取绿色通道，放入有界队列，结束时放入 _END_OF_STREAM
+
+    解码出错时先把异常放入队列，由消费端重新抛出。
+    消费端提前退出时会置位 stop，解码线程随即停止，不会卡在已满的队列上。
+    """
+    width, height = DOWNSAMPLE_SIZE
+    # 复用所有输出缓冲，避免逐帧分配：解码帧、缩略 BGR 各一块；
+    # 放入队列的单通道帧轮流使用一组缓冲，数量要覆盖队列中的帧 + 消费端持有的当前帧和上一帧
+    frame = None
+    small_bgr = np.empty((height, width, 3), dtype=np.uint8)
+    ring = np.empty((DECODE_QUEUE_SIZE + 3, height, width), dtype=np.uint8)
+
+    try:
+        for i in itertools.count():
+            if stop.is_set():
+                break
+            ret, frame = cap.read(frame)
+            if not ret:
+                break
+
+            cv2.resize(frame, DOWNSAMPLE_SIZE, dst=small_bgr, interpolation=cv2.INTER_AREA)
+            # 运动检测只需要亮度变化，绿色通道（BGR 的第 1 通道）足够，省掉加权灰度转换
+            small = ring[i % len(ring)]
+            cv2.extractChannel(small_bgr, 1, dst=small)
+            if not _put_unless_stopped(frames, small, stop):
+                break
+    except Exception as e:
+        _put_unless_stopped(frames, e, stop)
+    finally:
+        _put_unless_stopped(frames, _END_OF_STREAM, stop)
+
+
+def analyze_video(video_path: str) -> Tuple[np.ndarray, float]:
+    """
+    单次解码视频，计算相邻帧的平均差异
+
+    阈值估计和运动检测共用这一组差异值，整个视频只解码一遍。
+    解码在后台线程进行（OpenCV 调用会释放 GIL），与帧差计算重叠。
 
     Args:
         video_path: 视频路径
-        percentile: 百分位数（建议 70-80）
 
     Returns:
-        自适应阈值
+        (diffs, fps) - 第 i 项为第 i 帧与第 i+1 帧的平均差异（0-255），以及帧率
     """
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"无法打开视频: {video_path}")
+    cap = open_capture(video_path)
 
-    diffs = []
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    # 帧数只是容器里的提示值，可能偏小，写满后再扩容
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    diffs = np.empty(max(frame_count - 1, 0), dtype=np.float32)
+    n_diffs = 0
     prev_frame = None
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    frames = queue.Queue(maxsize=DECODE_QUEUE_SIZE)
+    stop = threading.Event()
+    decoder = threading.Thread(target=_decode_small_frames, args=(cap, frames, stop), daemon=True)
+    decoder.start()
 
-        if prev_frame is not None:
-            diff = cv2.absdiff(prev_frame, gray)
-            diffs.append(np.mean(diff))
-
-        prev_frame = gray
+    try:
+        while (small := frames.get()) is not _END_OF_STREAM:
+            if isinstance(small, Exception):
+                raise small
+
+            if prev_frame is not None:
+                if n_diffs == len(diffs):
+                    diffs = np.concatenate([diffs, np.empty(max(len(diffs), 64), dtype=np.float32)])
+                # L1 范数 = 绝对差之和（SAD），一次遍历完成，不分配中间 diff 缓冲
+                diffs[n_diffs] = cv2.norm(prev_frame, small, cv2.NORM_L1) / small.size
+                n_diffs += 1
+
+            prev_frame = small
+    finally:
+        # 无论正常结束还是中途异常：通知解码线程停止，清空队列让它不再阻塞，等它退出后再释放 cap
+        stop.set()
+        while True:
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                break
+        decoder.join()
+        cap.release()
+
+    return diffs[:n_diffs], fps
+
+
+def adaptive_threshold(diffs: np.ndarray, percentile: float = 75) -> float:
+    """
+    根据视频整体差异分布自动确定阈值
 
-    cap.release()
+    Args:
+        diffs: analyze_video() 返回的帧差异
+        percentile: 百分位数（建议 70-80）
 
-    if not diffs:
+    Returns:
+        自适应阈值
+    """
+    if diffs.size == 0:
         return 5.0
 
-    threshold = np.percentile(diffs, percentile)
+    threshold = float(np.percentile(diffs, percentile))
     return max(threshold, 3.0)
 
 
 def detect_motion_segments(
-    video_path: str,
+    diffs: np.ndarray,
+    fps: float,
     threshold: float,
     min_motion_duration: float = 0.3
-) -> Tuple[List[Tuple[float, float]], float]:
+) -> np.ndarray:
     """
     检测视频中的运动片段
 
     Args:
-        video_path: 视频路径
+        diffs: analyze_video() 返回的帧差异
+        fps: 帧率
         threshold: 帧差异阈值（0-255）
         min_motion_duration: 最小运动时长（秒）
 
     Returns:
-        (segments, fps) - 运动片段时间戳列表和帧率
+        运动片段时间戳数组 [(start, end), ...]，形状 (N, 2)，单位秒
     """
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"无法打开视频: {video_path}")
-
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    prev_frame = None
-    motion_flags = []
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        if prev_frame is not None:
-            diff = cv2.absdiff(prev_frame, gray)
-            mean_diff = np.mean(diff)
-            motion_flags.append(mean_diff > threshold)
+    flags = (diffs > threshold).astype(np.int8)
 
-        prev_frame = gray
+    # 两端补 0 后求差分：每段连续运动帧恰好产生一对跳变，偶数位是起点，奇数位是终点
+    transitions = np.flatnonzero(np.diff(flags, prepend=0, append=0))
+    starts, ends = transitions[::2], transitions[1::2]
 
-    cap.release()
-
-    # 合并连续运动帧为时间段
-    segments = []
-    in_motion = False
-    start_frame = 0
     min_frames = int(min_motion_duration * fps)
+    valid = (ends - starts) >= min_frames
 
-    for i, is_motion in enumerate(motion_flags):
-        if is_motion and not in_motion:
-            start_frame = i
-            in_motion = True
-        elif not is_motion and in_motion:
-            if i - start_frame >= min_frames:
-                segments.append((start_frame / fps, i / fps))
-            in_motion = False
-
-    if in_motion and len(motion_flags) - start_frame >= min_frames:
-        segments.append((start_frame / fps, len(motion_flags) / fps))
-
-    return segments, fps
+    return np.column_stack((starts[valid], ends[valid])) / fps
 
 
-def merge_segments(segments: List[Tuple[float, float]], max_gap: float = 0.3) -> List[Tuple[float, float]]:
+def merge_segments(segments: ArrayLike, max_gap: float = 0.3) -> np.ndarray:
     """
     合并间隔小于 max_gap 秒的片段
 
     Args:
-        segments: 时间段列表 [(start, end), ...]
+        segments: 按时间排序的时间段 [(start, end), ...]，形状 (N, 2)
         max_gap: 最大间隔（秒）
 
     Returns:
-        合并后的时间段列表
+        合并后的时间段数组，形状 (M, 2)
     """
-    if not segments:
-        return []
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2)
+    if len(segments) == 0:
+        return segments
 
-    merged = [segments[0]]
-    for start, end in segments[1:]:
-        last_start, last_end = merged[-1]
-        if start - last_end <= max_gap:
-            merged[-1] = (last_start, end)
-        else:
-            merged.append((start, end))
+    # 与前一段间隔超过 max_gap 的片段开启新的一组；每组取首段 start、末段 end
+    opens_group = np.empty(len(segments), dtype=bool)
+    opens_group[0] = True
+    opens_group[1:] = segments[1:, 0] - segments[:-1, 1] > max_gap
 
-    return merged
+    first = np.flatnonzero(opens_group)
+    last = np.append(first[1:] - 1, len(segments) - 1)
+    return np.column_stack((segments[first, 0], segments[last, 1]))
 
 
 def add_buffer(
-    segments: List[Tuple[float, float]],
+    segments: ArrayLike,
     buffer: float = 0.2,
     video_duration: Optional[float] = None
-) -> List[Tuple[float, float]]:
+) -> np.ndarray:
     """
     在运动片段前后各加 buffer 秒
 
     Args:
-        segments: 时间段列表
+        segments: 时间段数组，形状 (N, 2)
         buffer: 缓冲时间（秒）
         video_duration: 视频总时长（秒）
 
     Returns:
-        添加缓冲后的时间段列表
+        添加缓冲后的时间段数组，形状 (N, 2)
     """
-    buffered = []
-    for start, end in segments:
-        new_start = max(0, start - buffer)
-        new_end = end + buffer
-        if video_duration:
-            new_end = min(video_duration, new_end)
-        buffered.append((new_start, new_end))
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2)
+
+    buffered = np.empty_like(segments)
+    np.maximum(segments[:, 0] - buffer, 0, out=buffered[:, 0])
+    buffered[:, 1] = segments[:, 1] + buffer
+    if video_duration:
+        np.minimum(buffered[:, 1], video_duration, out=buffered[:, 1])
 
     return buffered
 
 
 def extract_segments(
     video_path: str,
-    segments: List[Tuple[float, float]],
-    output_path: str
+    segments: ArrayLike,
+    output_path: str,
+    keep_audio: bool = False
 ) -> None:
     """
     使用 FFmpeg 提取运动片段并拼接
 
+    所有片段写进同一个 concat 列表（同一输入文件 + inpoint/outpoint），
+    列表经 stdin 传给 FFmpeg，一次调用完成切割和拼接，不落盘任何中间文件。
+
     Args:
         video_path: 输入视频路径
         segments: 时间段列表
         output_path: 输出视频路径
+        keep_audio: 是否保留音轨（屏幕录制通常没有有用的音频，默认丢弃）
     """
-    if not segments:
+    if len(segments) == 0:
         raise ValueError("没有检测到运动片段")
 
-    if len(segments) == 1:
-        start, end = segments[0]
-        subprocess.run([
-            "ffmpeg", "-y", "-i", video_path,
-            "-ss", str(start), "-to", str(end),
-            "-c", "copy",
-            output_path
-        ], check=True, capture_output=True)
-        return
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        segment_paths = []
-        concat_file = os.path.join(tmpdir, "segments.txt")
-
-        for i, (start, end) in enumerate(segments):
-            segment_path = os.path.join(tmpdir, f"segment_{i}.mp4")
-            subprocess.run([
-                "ffmpeg", "-y", "-i", video_path,
-                "-ss", str(start), "-to", str(end),
-                "-c", "copy",
-                segment_path
-            ], check=True, capture_output=True)
-            segment_paths.append(segment_path)
-
-        with open(concat_file, "w") as f:
-            for path in segment_paths:
-                f.write(f"file '{path}'\n")
-
-        subprocess.run([
-            "ffmpeg", "-y", "-f", "concat", "-safe", "0",
-            "-i", concat_file,
-            "-c", "copy",
-            output_path
-        ], check=True, capture_output=True)
+    # 列表从 pipe 读取时相对路径会按 pipe: 解析，需显式写 file: 协议；
+    # 路径用单引号包裹，路径自身的单引号需转义
+    quoted_path = "file:" + video_path.replace("'", "'\\''")
 
+    concat_list = "".join(
+        f"file '{quoted_path}'\ninpoint {start:.6f}\noutpoint {end:.6f}\n"
+        for start, end in segments
+    )
 
-def get_video_duration(video_path: str) -> float:
-    """获取视频时长（秒）"""
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"无法打开视频: {video_path}")
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "concat", "-safe", "0",
+        "-protocol_whitelist", "file,pipe",
+        "-i", "pipe:0",
+        "-c", "copy",
+        *([] if keep_audio else ["-an"]),
+        output_path
+    ], input=concat_list.encode(), check=True, capture_output=True)
 
-    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    cap.release()
 
-    return frame_count / fps if fps > 0 else 0
+def get_video_duration(video_path: str) -> float:
+    """获取视频时长（秒），只读容器元数据，不解码"""
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=nw=1:nk=1",
+        video_path
+    ], capture_output=True, text=True)
+
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        raise ValueError(f"无法读取视频时长: {video_path}") from None
 
 
 def trim_video(
@@ -249,6 +328,7 @@ def trim_video(
     min_motion_duration: float = 0.3,
     merge_gap: float = 0.3,
     buffer: float = 0.2,
+    keep_audio: bool = False,
     verbose: bool = True
 ) -> str:
     """
@@ -261,6 +341,7 @@ def trim_video(
         min_motion_duration: 最小运动时长（秒）
         merge_gap: 合并间隔（秒）
         buffer: 缓冲时间（秒）
+        keep_audio: 是否保留音轨（默认丢弃）
         verbose: 是否打印详细日志
 
     Returns:
@@ -280,28 +361,31 @@ def trim_video(
     # 1. 获取视频时长
     duration = get_video_duration(input_path)
 
-    # 2. 自动检测阈值
+    # 2. 单次解码计算帧差异
+    diffs, fps = analyze_video(input_path)
+
+    # 3. 自动检测阈值
     if threshold is None:
-        threshold = adaptive_threshold(input_path)
+        threshold = adaptive_threshold(diffs)
         if verbose:
             log(f"   自动阈值: {threshold:.2f}")
 
-    # 3. 检测运动片段
-    segments, _ = detect_motion_segments(input_path, threshold, min_motion_duration)
+    # 4. 检测运动片段
+    segments = detect_motion_segments(diffs, fps, threshold, min_motion_duration)
 
-    if not segments:
+    if len(segments) == 0:
         if verbose:
             log(f"   ⚠️  未检测到运动片段，保留原视频")
         return input_path
 
-    # 4. 合并相邻片段
+    # 5. 合并相邻片段
     segments = merge_segments(segments, merge_gap)
 
-    # 5. 添加缓冲
+    # 6. 添加缓冲
     segments = add_buffer(segments, buffer, duration)
 
-    # 6. 检查是否需要裁剪
-    total_motion = sum(end - start for start, end in segments)
+    # 7. 检查是否需要裁剪
+    total_motion = float(np.sum(segments[:, 1] - segments[:, 0]))
     coverage = total_motion / duration if duration > 0 else 0
 
     if coverage >= 0.95:
@@ -309,7 +393,7 @@ def trim_video(
             log(f"   ℹ️  视频大部分是运动 ({coverage*100:.1f}%)，跳过裁剪")
         return input_path
 
-    # 7. 打印片段信息
+    # 8. 打印片段信息
     if verbose:
         log(f"   检测到 {len(segments)} 个运动片段:")
         for i, (start, end) in enumerate(segments, 1):
@@ -318,9 +402,9 @@ def trim_video(
         reduction = (1 - total_motion / duration) * 100 if duration > 0 else 0
         log(f"   原始: {duration:.1f}s → 裁剪后: {total_motion:.1f}s (减少 {reduction:.0f}%)")
 
-    # 8. 提取并拼接
+    # 9. 提取并拼接
     try:
-        extract_segments(input_path, segments, output_path)
+        extract_segments(input_path, segments, output_path, keep_audio)
         if verbose:
             log(f"   ✓ 保存至: {Path(output_path).name}")
         return output_path
@@ -346,6 +430,7 @@ if __name__ == "__main__":
   %(prog)s video.mp4 -o output.mp4            # 指定输出路径
   %(prog)s video.mp4 --threshold 8.0          # 手动设置阈值
   %(prog)s video.mp4 --buffer 0.5             # 增加缓冲时间
+  %(prog)s video.mp4 --keep-audio             # 保留音轨
   %(prog)s video.mp4 --quiet                  # 静默模式
         """
     )
@@ -381,6 +466,11 @@ if __name__ == "__main__":
         default=0.2,
         help="缓冲时间（秒，默认: 0.2）"
     )
+    parser.add_argument(
+        "--keep-audio",
+        action="store_true",
+        help="保留音轨（默认丢弃）"
+    )
     parser.add_argument(
         "--quiet",
         action="store_true",
@@ -397,6 +487,7 @@ if __name__ == "__main__":
             min_motion_duration=args.min_duration,
             merge_gap=args.merge_gap,
             buffer=args.buffer,
+            keep_audio=args.keep_audio,
             verbose=not args.quiet
         )
 
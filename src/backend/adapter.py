@@ -5,10 +5,14 @@ Exposes the unified LangGraph pipeline via AG-UI protocol.
 """
 import uuid
 import asyncio
+import logging
 import time
-from typing import AsyncGenerator, Optional
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Optional
 
+import orjson
 from ag_ui.core import (
+    BaseEvent,
     RunAgentInput,
     EventType,
     RunStartedEvent,
@@ -18,7 +22,6 @@ from ag_ui.core import (
     StateDeltaEvent,
     CustomEvent,
 )
-from ag_ui.encoder import EventEncoder
 from langgraph.types import Command
 
 from pipeline.unified_graph import compile_unified_graph
@@ -26,38 +29,330 @@ from pipeline.state import create_initial_state
 from .event_translator import EventTranslator, extract_ui_state, make_json_safe
 
 
+logger = logging.getLogger(__name__)
+
 SSE_CONTENT_TYPE = "text/event-stream"
 
+# Graph events between explicit scheduler yields in the streaming loop
+EVENT_LOOP_YIELD_EVERY = 32
+
+# Graph events after which the checkpointed state may have changed
+STATE_REFRESH_EVENTS = ("on_chain_start", "on_chain_end", "on_tool_end")
+
+# SSE keep-alive
+HEARTBEAT_INTERVAL_S = 15
+HEARTBEAT = b": heartbeat\n\n"
+
+# Buffered graph events waiting for the SSE writer
+EVENT_QUEUE_SIZE = 256
+
+# SSE write batching: flush at this many bytes or after this delay (seconds)
+SSE_BATCH_BYTES = 4096
+SSE_BATCH_DELAY_S = 0.01
+
+
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+def encode_sse(event: BaseEvent) -> bytes:
+    """
+    Encode an AG-UI event as an SSE frame.
+
+    Same JSON as ag_ui's EventEncoder (model_dump_json(by_alias=True), so
+    explicit None values such as a JSON Patch "value": null are kept), but
+    serialized straight to bytes by pydantic-core (no intermediate dict or
+    str) so the ASGI server can write it without re-encoding.
+    """
+    return _SSE_PREFIX + event.__pydantic_serializer__.to_json(event, by_alias=True) + _SSE_SUFFIX
+
+
+def _frame_template(event: BaseEvent, *placeholders: str) -> bytes:
+    """encode_sse() output with each placeholder string turned into a %b slot."""
+    frame = encode_sse(event).replace(b"%", b"%%")
+    for placeholder in placeholders:
+        frame = frame.replace(orjson.dumps(placeholder), b"%b", 1)
+    return frame
 
-def get_capture_tasks_for_project(project_id: str) -> list[dict]:
+
+# RUN_STARTED and the initial STATE_SNAPSHOT only differ by a few ids between
+# runs, so their frames are pre-serialized once through encode_sse and the
+# variable fields are filled in with orjson-encoded values.
+_RUN_STARTED_FRAME = _frame_template(
+    RunStartedEvent(
+        type=EventType.RUN_STARTED,
+        thread_id="__THREAD_ID__",
+        run_id="__RUN_ID__",
+    ),
+    "__THREAD_ID__", "__RUN_ID__",
+)
+
+_INITIAL_SNAPSHOT_FRAME = _frame_template(
+    StateSnapshotEvent(
+        type=EventType.STATE_SNAPSHOT,
+        snapshot={
+            "pipeline_mode": "__PIPELINE_MODE__",
+            "status": "starting",
+            "current_stage": "initializing",
+            "stage_message": "Starting pipeline...",
+            "progress_percent": 0,
+            "video_project_id": "__VIDEO_PROJECT_ID__",
+            "captures_total": 0,
+            "captures_completed": 0,
+            "capture_tasks": [],
+        },
+    ),
+    "__PIPELINE_MODE__", "__VIDEO_PROJECT_ID__",
+)
+
+
+def get_capture_tasks_for_project(project_id: str) -> tuple[list[dict], int]:
     """
     Fetch capture tasks with cloud URLs for frontend display.
+
+    Returns:
+        (tasks, completed_count)
     """
     if not project_id:
-        return []
+        return [], 0
 
     try:
         from db.supabase_client import get_supabase
 
         supabase = get_supabase()
+        # Columns are aliased server-side so rows already have the UI shape;
+        # creation order is what the UI shows and keeps the poller's change
+        # hash stable (index: migrations/014_capture_tasks_project_id_index.sql)
         result = supabase.table("capture_tasks") \
-            .select("id, task_description, status, asset_url, capture_type") \
+            .select("id, description:task_description, status, asset_url, capture_type") \
             .eq("video_project_id", project_id) \
+            .order("created_at") \
             .execute()
         
-        return [
-            {
-                "id": task["id"],
-                "description": task.get("task_description", ""),
-                "status": task.get("status", "pending"),
-                "asset_url": task.get("asset_url"),
-                "capture_type": task.get("capture_type", "screenshot"),
-            }
-            for task in result.data
-        ]
+        tasks = result.data
+        completed_count = 0
+        for task in tasks:
+            # Aliases can't supply defaults, so fill NULL columns here
+            task["description"] = task["description"] or ""
+            task["status"] = status = task["status"] or "pending"
+            task["capture_type"] = task["capture_type"] or "screenshot"
+            if status == "completed":
+                completed_count += 1
+        return tasks, completed_count
     except Exception as e:
         print(f"Error fetching capture tasks: {e}")
-        return []
+        return [], 0
+
+
+# ─────────────────────────────────────────────────────────────
+# Heartbeat multiplexing
+# ─────────────────────────────────────────────────────────────
+
+# Marker yielded by with_heartbeat() in place of a graph event
+HEARTBEAT_TICK = object()
+
+_STREAM_END = object()
+
+
+async def with_heartbeat(
+    events: AsyncIterator[dict],
+    interval_s: float,
+) -> AsyncGenerator[Any, None]:
+    """
+    Multiplex graph events and keep-alive ticks through one queue.
+
+    A pump task drains `events` into the queue while a ticker task adds
+    HEARTBEAT_TICK every `interval_s` seconds, so the consumer never has to
+    check the clock per event. Errors raised by `events` are re-raised here.
+    Both tasks are cancelled when the generator is closed.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    async def pump() -> None:
+        try:
+            async for event in events:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_STREAM_END)
+
+    async def ticker() -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                queue.put_nowait(HEARTBEAT_TICK)
+            except asyncio.QueueFull:
+                pass  # Events are waiting anyway, no keep-alive needed
+
+    pump_task = asyncio.create_task(pump())
+    ticker_task = asyncio.create_task(ticker())
+    try:
+        while (item := await queue.get()) is not _STREAM_END:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        ticker_task.cancel()
+        pump_task.cancel()
+
+
+# ─────────────────────────────────────────────────────────────
+# SSE write batching
+# ─────────────────────────────────────────────────────────────
+
+# RUN_STARTED / RUN_FINISHED / RUN_ERROR frames are sent without waiting
+_RUN_FRAME_PREFIX = b'data: {"type":"RUN_'
+
+
+async def batch_frames(
+    frames: AsyncIterator[bytes],
+    max_bytes: int = SSE_BATCH_BYTES,
+    max_delay_s: float = SSE_BATCH_DELAY_S,
+) -> AsyncGenerator[bytes, None]:
+    """
+    Join SSE frames that are ready at the same time into one write.
+
+    A pump task drains `frames` into a queue; the consumer takes whatever is
+    already queued and yields it as one chunk, flushing once the batch
+    reaches `max_bytes`, `max_delay_s` has passed, a RUN_* frame is added or
+    the queue is empty. Frames are never held back waiting for more, so
+    latency is unchanged while token bursts become a single ASGI send.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    async def pump() -> None:
+        try:
+            async for frame in frames:
+                await queue.put(frame)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_STREAM_END)
+
+    pump_task = asyncio.create_task(pump())
+    try:
+        item = await queue.get()
+        while item is not _STREAM_END:
+            if isinstance(item, Exception):
+                raise item
+
+            batch = [item]
+            size = len(item)
+            deadline = time.monotonic() + max_delay_s
+            item = None
+            while (size < max_bytes
+                   and not batch[-1].startswith(_RUN_FRAME_PREFIX)
+                   and time.monotonic() < deadline):
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    item = None
+                    break
+                if not isinstance(item, bytes):
+                    break  # End of stream or error: flush first
+                batch.append(item)
+                size += len(item)
+                item = None
+
+            yield b"".join(batch)
+
+            if item is None:
+                item = await queue.get()
+    finally:
+        pump_task.cancel()
+
+
+# ─────────────────────────────────────────────────────────────
+# Capture task polling
+# ─────────────────────────────────────────────────────────────
+
+# Nodes whose completion may change capture task rows
+CAPTURE_POLL_NODES = ("capture_single", "aggregate", "move_to_next", "load_assets")
+
+# Nodes that always trigger a fetch (end of the capture phase)
+CAPTURE_FLUSH_NODES = ("aggregate", "load_assets")
+
+# Minimum seconds between two fetches for non-flush nodes
+CAPTURE_FETCH_INTERVAL_S = 1.0
+
+# Modes where capture tasks are static once load_assets has run
+CAPTURE_STATIC_MODES = ("upload", "editor_only")
+
+
+class CaptureTaskPoller:
+    """
+    Coalesces capture task fetches triggered by node-end events.
+
+    Fetches at most once per CAPTURE_FETCH_INTERVAL_S (flush nodes always
+    fetch), runs the Supabase query off the event loop, and only returns
+    tasks when their (id, status) pairs changed since the last emit.
+
+    In upload/editor_only modes the tasks never change after load_assets,
+    so the list fetched there is frozen and no further queries are made.
+
+    build_delta() only includes the capture fields that differ from what
+    was last sent to the client.
+    """
+
+    def __init__(self, mode: str = "full"):
+        self._last_fetch_ts = 0.0
+        self._last_tasks_hash = None
+        self._static_mode = mode in CAPTURE_STATIC_MODES
+        self._capture_tasks_frozen = False
+        self._tasks: Optional[tuple[list[dict], int]] = None
+        self._last_captures_total = 0
+        self._last_captures_completed = 0
+
+    async def poll(self, project_id: str, node_name: str) -> Optional[tuple[list[dict], int]]:
+        """Return (tasks, completed_count) if the tasks changed, else None."""
+        if self._capture_tasks_frozen:
+            return None
+
+        now = time.monotonic()
+        if node_name not in CAPTURE_FLUSH_NODES and now - self._last_fetch_ts <= CAPTURE_FETCH_INTERVAL_S:
+            return None
+        self._last_fetch_ts = now
+
+        self._tasks = await asyncio.to_thread(get_capture_tasks_for_project, project_id)
+        tasks = self._tasks[0]
+        if self._static_mode and node_name == "load_assets":
+            self._capture_tasks_frozen = True
+
+        tasks_hash = hash(tuple((t["id"], t["status"]) for t in tasks))
+        if tasks_hash == self._last_tasks_hash:
+            return None
+        self._last_tasks_hash = tasks_hash
+        return self._tasks
+
+    def build_delta(self, tasks: list[dict], completed_count: int) -> list[dict]:
+        """
+        Build STATE_DELTA ops for the capture fields that changed.
+
+        Args:
+            tasks: Task list returned by poll() (already known to have changed)
+            completed_count: Completed tasks in that list
+
+        Returns:
+            JSON patch ops (the task list, plus counters that changed)
+        """
+        delta = [{"op": "replace", "path": "/capture_tasks", "value": tasks}]
+
+        if completed_count != self._last_captures_completed:
+            delta.append({"op": "replace", "path": "/captures_completed", "value": completed_count})
+            self._last_captures_completed = completed_count
+
+        if len(tasks) != self._last_captures_total:
+            delta.append({"op": "replace", "path": "/captures_total", "value": len(tasks)})
+            self._last_captures_total = len(tasks)
+
+        return delta
+
+    async def latest(self, project_id: str) -> tuple[list[dict], int]:
+        """Return the frozen (tasks, completed_count) if available, else fetch it."""
+        if self._capture_tasks_frozen:
+            return self._tasks
+        return await asyncio.to_thread(get_capture_tasks_for_project, project_id)
 
 
 async def run_pipeline_stream(
@@ -65,7 +360,7 @@ async def run_pipeline_stream(
     mode: str = "full",
     include_render: bool = True,
     include_music: bool = True,
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     Stream AG-UI events from pipeline execution with heartbeat keep-alive.
 
@@ -80,7 +375,6 @@ async def run_pipeline_stream(
     """
     print(f"\n🚀 [PIPELINE] Starting pipeline stream - mode={mode}, render={include_render}, music={include_music}", flush=True)
 
-    encoder = EventEncoder(accept=SSE_CONTENT_TYPE)
     thread_id = input_data.thread_id or str(uuid.uuid4())
     run_id = input_data.run_id or str(uuid.uuid4())
 
@@ -88,21 +382,11 @@ async def run_pipeline_stream(
 
     translator = EventTranslator(thread_id, run_id)
 
-    # 心跳追踪
-    last_event_time = time.time()
-    HEARTBEAT_INTERVAL = 15  # 秒
-    
     # ─────────────────────────────────────────────────────────
     # 1. RUN_STARTED
     # ─────────────────────────────────────────────────────────
     print(f"  🔊 AG-UI: RUN_STARTED", flush=True)
-    yield encoder.encode(RunStartedEvent(
-        type=EventType.RUN_STARTED,
-        thread_id=thread_id,
-        run_id=run_id,
-    ))
-    last_event_time = time.time()
-    await asyncio.sleep(0)  # Allow event loop to send data
+    yield _RUN_STARTED_FRAME % (orjson.dumps(thread_id), orjson.dumps(run_id))
     
     # ─────────────────────────────────────────────────────────
     # 2. Initial STATE_SNAPSHOT
@@ -124,26 +408,9 @@ async def run_pipeline_stream(
             mode = input_data.state["pipeline_mode"]
 
     print(f"📦 [PIPELINE] video_project_id={video_project_id}, user_message={user_message[:50] if user_message else 'None'}...", flush=True)
-    
-    initial_ui_state = {
-        "pipeline_mode": mode,
-        "status": "starting",
-        "current_stage": "initializing",
-        "stage_message": "Starting pipeline...",
-        "progress_percent": 0,
-        "video_project_id": video_project_id,
-        "captures_total": 0,
-        "captures_completed": 0,
-        "capture_tasks": [],
-    }
 
     print(f"  🔊 AG-UI: STATE_SNAPSHOT (initial)", flush=True)
-    yield encoder.encode(StateSnapshotEvent(
-        type=EventType.STATE_SNAPSHOT,
-        snapshot=initial_ui_state,
-    ))
-    last_event_time = time.time()
-    await asyncio.sleep(0)  # Allow event loop to send data
+    yield _INITIAL_SNAPSHOT_FRAME % (orjson.dumps(mode), orjson.dumps(video_project_id))
     
     # ─────────────────────────────────────────────────────────
     # 3. Compile Graph
@@ -164,11 +431,23 @@ async def run_pipeline_stream(
     print(f"▶️  [PIPELINE] Starting graph execution...", flush=True)
     
     config = {"configurable": {"thread_id": thread_id}}
+
+    # Whether get_state works at all (e.g. a checkpointer is configured) is
+    # fixed for the graph, so probe it once and skip refreshes if it doesn't
+    try:
+        graph.get_state(config)
+        state_unavailable = False
+    except Exception as e:
+        print(f"⚠️  [PIPELINE] Graph state unavailable, streaming without it: {e}", flush=True)
+        state_unavailable = True
     
     # ─────────────────────────────────────────────────────────
     # 4. Stream Graph Execution
     # ─────────────────────────────────────────────────────────
     last_project_id = video_project_id
+    capture_poller = CaptureTaskPoller(mode)
+    event_count = 0
+    cached_state = {}
 
     try:
         # Check if resuming from interrupt
@@ -176,140 +455,85 @@ async def run_pipeline_stream(
             resume_payload = input_data.resume.get("payload") if isinstance(input_data.resume, dict) else None
 
             # Resume graph with user's response
-            async for event in graph.astream_events(
-                Command(resume=resume_payload),
-                config=config,
-                version="v2",
-            ):
-                # Get current state if possible
-                current_state = {}
-                try:
-                    state_snapshot = graph.get_state(config)
-                    if state_snapshot and hasattr(state_snapshot, 'values'):
-                        current_state = state_snapshot.values
-                except:
-                    pass
-
-                # Translate LangGraph event to AG-UI events
-                for ag_event in translator.translate(event, current_state):
-                    print(f"  🔊 AG-UI: {ag_event.type} | {getattr(ag_event, 'step_name', '')} | {getattr(ag_event, 'delta', '')[:100] if hasattr(ag_event, 'delta') else ''}", flush=True)
-                    yield encoder.encode(ag_event)
-                    last_event_time = time.time()
-
-                # Check for project ID updates
-                if current_state:
-                    new_project_id = current_state.get("video_project_id")
-                    if new_project_id and new_project_id != last_project_id:
-                        last_project_id = new_project_id
-
-                        # Emit project ID update
-                        print(f"  🔊 AG-UI: STATE_DELTA (project_id={new_project_id})", flush=True)
-                        yield encoder.encode(StateDeltaEvent(
-                            type=EventType.STATE_DELTA,
-                            delta=[
-                                {"op": "replace", "path": "/video_project_id", "value": new_project_id},
-                            ],
-                        ))
-                        last_event_time = time.time()
-
-                # Periodically fetch and emit capture task status
-                if event.get("event") == "on_chain_end":
-                    node_name = event.get("name", "")
-
-                    # In upload/editor_only mode, also emit capture tasks after load_assets
-                    if node_name in ("capture_single", "aggregate", "move_to_next", "load_assets") and last_project_id:
-                        tasks = get_capture_tasks_for_project(last_project_id)
-
-                        print(f"  🔊 AG-UI: STATE_DELTA (capture_tasks, completed={sum(1 for t in tasks if t['status'] == 'completed')}/{len(tasks)})", flush=True)
-                        yield encoder.encode(StateDeltaEvent(
-                            type=EventType.STATE_DELTA,
-                            delta=[
-                                {"op": "replace", "path": "/capture_tasks", "value": tasks},
-                                {"op": "replace", "path": "/captures_completed",
-                                 "value": sum(1 for t in tasks if t["status"] == "completed")},
-                                {"op": "replace", "path": "/captures_total", "value": len(tasks)},
-                            ],
-                        ))
-                        last_event_time = time.time()
-
-                # 心跳：保持连接活跃
-                now = time.time()
-                if now - last_event_time > HEARTBEAT_INTERVAL:
-                    yield ": heartbeat\n\n"
-                    last_event_time = now
-
-                # Small yield to allow other async tasks
-                await asyncio.sleep(0)
+            stream_input = Command(resume=resume_payload)
         else:
             # Normal execution (not resuming)
             print(f"🔄 [PIPELINE] Streaming events from graph...", flush=True)
-            async for event in graph.astream_events(
-                initial_state,
-                config=config,
-                version="v2",
-            ):
+            stream_input = initial_state
+
+        events = graph.astream_events(
+            stream_input,
+            config=config,
+            version="v2",
+        )
+        async with aclosing(with_heartbeat(events, HEARTBEAT_INTERVAL_S)) as stream:
+            async for event in stream:
+                # 心跳：保持连接活跃；translate() 只在新 token 到达时检查缓冲时长，
+                # 模型停顿时这里把滞留的文本一并发出
+                if event is HEARTBEAT_TICK:
+                    for ag_event in translator.flush_text():
+                        yield encode_sse(ag_event)
+                    yield HEARTBEAT
+                    continue
+
                 event_type = event.get("event", "unknown")
-                event_name = event.get("name", "")
-                print(f"  📡 Event: {event_type} | {event_name}", flush=True)
-                # Get current state if possible
-                current_state = {}
-                try:
-                    state_snapshot = graph.get_state(config)
-                    if state_snapshot and hasattr(state_snapshot, 'values'):
-                        current_state = state_snapshot.values
-                except:
-                    pass
+                logger.debug("  📡 Event: %s | %s", event_type, event.get("name", ""))
+
+                # State only changes at node/tool boundaries; token events reuse the cached copy
+                if event_type in STATE_REFRESH_EVENTS and not state_unavailable:
+                    # A transient checkpointer/DB error keeps the last good state
+                    # instead of failing the run
+                    try:
+                        state_snapshot = graph.get_state(config)
+                        if state_snapshot and hasattr(state_snapshot, 'values'):
+                            cached_state = state_snapshot.values
+                    except Exception as e:
+                        logger.warning("⚠️  [PIPELINE] State refresh failed, using cached state: %s", e)
+                current_state = cached_state
 
                 # Translate LangGraph event to AG-UI events
                 for ag_event in translator.translate(event, current_state):
-                    print(f"  🔊 AG-UI: {ag_event.type} | {getattr(ag_event, 'step_name', '')} | {getattr(ag_event, 'delta', '')[:100] if hasattr(ag_event, 'delta') else ''}", flush=True)
-                    yield encoder.encode(ag_event)
-                    last_event_time = time.time()
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("  🔊 AG-UI: %s | %s", ag_event.type, getattr(ag_event, "step_name", ""))
+                    yield encode_sse(ag_event)
 
-                # Check for project ID updates
-                if current_state:
-                    new_project_id = current_state.get("video_project_id")
+                if event_type == "on_chain_end":
+                    node_name = event.get("name", "")
+
+                    # Project ID updates arrive as a node's output (e.g. analyze_and_plan)
+                    output = event.get("data", {}).get("output")
+                    new_project_id = output.get("video_project_id") if isinstance(output, dict) else None
                     if new_project_id and new_project_id != last_project_id:
                         last_project_id = new_project_id
 
                         # Emit project ID update
                         print(f"  🔊 AG-UI: STATE_DELTA (project_id={new_project_id})", flush=True)
-                        yield encoder.encode(StateDeltaEvent(
+                        yield encode_sse(StateDeltaEvent(
                             type=EventType.STATE_DELTA,
                             delta=[
                                 {"op": "replace", "path": "/video_project_id", "value": new_project_id},
                             ],
                         ))
-                        last_event_time = time.time()
 
-                # Periodically fetch and emit capture task status
-                if event.get("event") == "on_chain_end":
-                    node_name = event.get("name", "")
+                    # Periodically fetch and emit capture task status
 
                     # In upload/editor_only mode, also emit capture tasks after load_assets
-                    if node_name in ("capture_single", "aggregate", "move_to_next", "load_assets") and last_project_id:
-                        tasks = get_capture_tasks_for_project(last_project_id)
-
-                        print(f"  🔊 AG-UI: STATE_DELTA (capture_tasks, completed={sum(1 for t in tasks if t['status'] == 'completed')}/{len(tasks)})", flush=True)
-                        yield encoder.encode(StateDeltaEvent(
-                            type=EventType.STATE_DELTA,
-                            delta=[
-                                {"op": "replace", "path": "/capture_tasks", "value": tasks},
-                                {"op": "replace", "path": "/captures_completed",
-                                 "value": sum(1 for t in tasks if t["status"] == "completed")},
-                                {"op": "replace", "path": "/captures_total", "value": len(tasks)},
-                            ],
-                        ))
-                        last_event_time = time.time()
-
-                # 心跳：保持连接活跃
-                now = time.time()
-                if now - last_event_time > HEARTBEAT_INTERVAL:
-                    yield ": heartbeat\n\n"
-                    last_event_time = now
-
-                # Small yield to allow other async tasks
-                await asyncio.sleep(0)
+                    if node_name in CAPTURE_POLL_NODES and last_project_id:
+                        polled = await capture_poller.poll(last_project_id, node_name)
+
+                        # Unchanged or throttled: nothing to send
+                        if polled is not None:
+                            tasks, completed_count = polled
+                            print(f"  🔊 AG-UI: STATE_DELTA (capture_tasks, completed={completed_count}/{len(tasks)})", flush=True)
+                            yield encode_sse(StateDeltaEvent(
+                                type=EventType.STATE_DELTA,
+                                delta=capture_poller.build_delta(tasks, completed_count),
+                            ))
+
+                # Give other tasks a turn every few events (not per token)
+                event_count += 1
+                if event_count % EVENT_LOOP_YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
 
         # ─────────────────────────────────────────────────────
         # 5. Finalize
@@ -318,7 +542,7 @@ async def run_pipeline_stream(
         # Close any open message stream
         for ag_event in translator.finalize_message():
             print(f"  🔊 AG-UI: {ag_event.type} (finalize)", flush=True)
-            yield encoder.encode(ag_event)
+            yield encode_sse(ag_event)
 
         # Get final state and check for interrupts
         try:
@@ -333,7 +557,7 @@ async def run_pipeline_stream(
                         interrupt_obj = task.interrupts[0]
 
                         print(f"  🔊 AG-UI: RUN_FINISHED (interrupt)", flush=True)
-                        yield encoder.encode(RunFinishedEvent(
+                        yield encode_sse(RunFinishedEvent(
                             type=EventType.RUN_FINISHED,
                             thread_id=thread_id,
                             run_id=run_id,
@@ -356,10 +580,10 @@ async def run_pipeline_stream(
 
         # Final capture tasks
         if last_project_id:
-            final_ui_state["capture_tasks"] = get_capture_tasks_for_project(last_project_id)
+            final_ui_state["capture_tasks"], _ = await capture_poller.latest(last_project_id)
 
         print(f"  🔊 AG-UI: STATE_SNAPSHOT (final)", flush=True)
-        yield encoder.encode(StateSnapshotEvent(
+        yield encode_sse(StateSnapshotEvent(
             type=EventType.STATE_SNAPSHOT,
             snapshot=final_ui_state,
         ))
@@ -370,7 +594,7 @@ async def run_pipeline_stream(
 
         # Emit error
         print(f"  🔊 AG-UI: RUN_ERROR ({str(e)[:100]})", flush=True)
-        yield encoder.encode(RunErrorEvent(
+        yield encode_sse(RunErrorEvent(
             type=EventType.RUN_ERROR,
             message=str(e),
         ))
@@ -381,7 +605,7 @@ async def run_pipeline_stream(
         # ─────────────────────────────────────────────────────
         # Note: If interrupted, we already returned early above
         print(f"  🔊 AG-UI: RUN_FINISHED (success)", flush=True)
-        yield encoder.encode(RunFinishedEvent(
+        yield encode_sse(RunFinishedEvent(
             type=EventType.RUN_FINISHED,
             thread_id=thread_id,
             run_id=run_id,
@@ -8,6 +8,7 @@ Maps:
 - state changes → STATE_DELTA
 """
 from typing import Any, Optional
+import time
 import uuid
 
 from ag_ui.core import (
@@ -40,11 +41,74 @@ TRACKED_NODES = {
 }
 
 
+# Exact types that are already JSON-safe (subclasses such as str enums take the slow path)
+_JSON_PRIMITIVES = frozenset({str, int, float, bool, type(None)})
+
+
+def _build_step_events(node_name: str, display_name: str, progress: Optional[int]) -> tuple:
+    """Build the fixed STEP_STARTED (+ progress STATE_DELTA) events for a tracked node."""
+    started = StepStartedEvent(
+        type=EventType.STEP_STARTED,
+        step_name=node_name,
+        metadata={"display_name": display_name},
+    )
+    if progress is None:
+        return (started,)
+    
+    return (started, StateDeltaEvent(
+        type=EventType.STATE_DELTA,
+        delta=[
+            {"op": "replace", "path": "/current_stage", "value": node_name},
+            {"op": "replace", "path": "/stage_message", "value": display_name},
+            {"op": "replace", "path": "/progress_percent", "value": progress},
+        ],
+    ))
+
+
+# Step events depend only on the node, so they are built once at import
+_NODE_START_EVENTS = {
+    node_name: _build_step_events(node_name, display_name, progress)
+    for node_name, (display_name, progress) in TRACKED_NODES.items()
+}
+_NODE_FINISH_EVENTS = {
+    node_name: StepFinishedEvent(type=EventType.STEP_FINISHED, step_name=node_name)
+    for node_name in TRACKED_NODES
+}
+# Bound lookups: one dict probe per node event, no global attribute lookup
+_NODE_START_EVENTS_GET = _NODE_START_EVENTS.get
+_NODE_FINISH_EVENTS_GET = _NODE_FINISH_EVENTS.get
+
+
+# Buffered LLM text is emitted once it reaches this many characters...
+TEXT_FLUSH_CHARS = 64
+# ...or has been waiting this long (seconds)
+TEXT_FLUSH_INTERVAL_S = 0.05
+
+
 def make_json_safe(obj: Any, seen: Optional[set] = None) -> Any:
     """
     Recursively make object JSON-serializable.
     Handles circular references, Pydantic models, etc.
+
+    Dicts with string keys and lists whose values are all primitives are
+    returned as-is instead of being copied. Only containers on the current
+    recursion path are tracked for cycles, so a child shared by two
+    branches is serialized in both.
     """
+    if type(obj) in _JSON_PRIMITIVES:
+        return obj
+    
+    if isinstance(obj, (str, int, float, bool)):
+        return obj
+    
+    # Flat containers hold only primitives, so they can't form cycles
+    if type(obj) is dict and all(
+        type(k) is str and type(v) in _JSON_PRIMITIVES for k, v in obj.items()
+    ):
+        return obj
+    if type(obj) is list and all(type(item) in _JSON_PRIMITIVES for item in obj):
+        return obj
+
     if seen is None:
         seen = set()
     
@@ -52,21 +116,20 @@ def make_json_safe(obj: Any, seen: Optional[set] = None) -> Any:
     if obj_id in seen:
         return "[Circular Reference]"
     
-    if isinstance(obj, (str, int, float, bool, type(None))):
-        return obj
-    
     seen.add(obj_id)
-    
-    if isinstance(obj, dict):
-        return {str(k): make_json_safe(v, seen) for k, v in obj.items()}
-    elif isinstance(obj, (list, tuple)):
-        return [make_json_safe(item, seen) for item in obj]
-    elif hasattr(obj, "model_dump"):
-        return make_json_safe(obj.model_dump(), seen)
-    elif hasattr(obj, "__dict__"):
-        return make_json_safe(obj.__dict__, seen)
-    else:
-        return str(obj)
+    try:
+        if isinstance(obj, dict):
+            return {str(k): make_json_safe(v, seen) for k, v in obj.items()}
+        elif isinstance(obj, (list, tuple)):
+            return [make_json_safe(item, seen) for item in obj]
+        elif hasattr(obj, "model_dump"):
+            return make_json_safe(obj.model_dump(), seen)
+        elif hasattr(obj, "__dict__"):
+            return make_json_safe(obj.__dict__, seen)
+        else:
+            return str(obj)
+    finally:
+        seen.discard(obj_id)
 
 
 def extract_ui_state(langgraph_state: dict) -> dict:
@@ -99,17 +162,14 @@ def extract_ui_state(langgraph_state: dict) -> dict:
             ui_state[field] = make_json_safe(langgraph_state[field])
     
     # Compute derived fields
-    pending = langgraph_state.get("pending_task_ids", [])
-    current_idx = langgraph_state.get("current_task_index", 0)
-    completed = langgraph_state.get("completed_task_ids", [])
-    
-    ui_state["captures_total"] = len(pending) if pending else 0
-    ui_state["captures_completed"] = len(completed) if completed else 0
+    captures_total = len(langgraph_state.get("pending_task_ids") or ())
+    ui_state["captures_total"] = captures_total
+    ui_state["captures_completed"] = len(langgraph_state.get("completed_task_ids") or ())
     
-    # Calculate capture progress
-    if pending and langgraph_state.get("current_stage") == "capturing":
-        capture_progress = (current_idx / len(pending)) * 30 + 20  # 20-50%
-        ui_state["progress_percent"] = int(capture_progress)
+    # Calculate capture progress (integer math, 20-50%)
+    if captures_total and langgraph_state.get("current_stage") == "capturing":
+        current_idx = langgraph_state.get("current_task_index", 0)
+        ui_state["progress_percent"] = 20 + (current_idx * 30) // captures_total
     
     return ui_state
 
@@ -133,6 +193,9 @@ class EventTranslator:
         self.in_message = False
         self.last_state_hash = None
         self.current_node = None
+        self._pending_text: list[str] = []
+        self._pending_len = 0
+        self._pending_since = 0.0
     
     def translate(
         self,
@@ -147,32 +210,21 @@ class EventTranslator:
         events = []
         event_type = langgraph_event.get("event")
         
+        # Any non-token event ends the current run of text chunks
+        if event_type != "on_chat_model_stream":
+            events.extend(self.flush_text())
+        
         # ─────────────────────────────────────────────────────
         # Node Start
         # ─────────────────────────────────────────────────────
         if event_type == "on_chain_start":
             node_name = langgraph_event.get("name", "")
             
-            if node_name in TRACKED_NODES:
+            start_events = _NODE_START_EVENTS_GET(node_name)
+            if start_events is not None:
                 self.current_node = node_name
-                display_name, progress = TRACKED_NODES[node_name]
-                
-                events.append(StepStartedEvent(
-                    type=EventType.STEP_STARTED,
-                    step_name=node_name,
-                    metadata={"display_name": display_name},
-                ))
-                
-                # Emit progress update
-                if progress is not None:
-                    events.append(StateDeltaEvent(
-                        type=EventType.STATE_DELTA,
-                        delta=[
-                            {"op": "replace", "path": "/current_stage", "value": node_name},
-                            {"op": "replace", "path": "/stage_message", "value": display_name},
-                            {"op": "replace", "path": "/progress_percent", "value": progress},
-                        ],
-                    ))
+                # STEP_STARTED plus progress update (prebuilt per node)
+                events.extend(start_events)
         
         # ─────────────────────────────────────────────────────
         # Node End
@@ -180,11 +232,9 @@ class EventTranslator:
         elif event_type == "on_chain_end":
             node_name = langgraph_event.get("name", "")
             
-            if node_name in TRACKED_NODES:
-                events.append(StepFinishedEvent(
-                    type=EventType.STEP_FINISHED,
-                    step_name=node_name,
-                ))
+            finish_event = _NODE_FINISH_EVENTS_GET(node_name)
+            if finish_event is not None:
+                events.append(finish_event)
                 self.current_node = None
         
         # ─────────────────────────────────────────────────────
@@ -212,13 +262,16 @@ class EventTranslator:
                 elif not isinstance(content, str):
                     content = str(content)
 
-                # Only emit if content is non-empty
+                # Buffer non-empty content; emit merged deltas instead of one per token
                 if content:
-                    events.append(TextMessageContentEvent(
-                        type=EventType.TEXT_MESSAGE_CONTENT,
-                        message_id=self.message_id,
-                        delta=content,
-                    ))
+                    if not self._pending_text:
+                        self._pending_since = time.monotonic()
+                    self._pending_text.append(content)
+                    self._pending_len += len(content)
+                    
+                    if (self._pending_len >= TEXT_FLUSH_CHARS
+                            or time.monotonic() - self._pending_since > TEXT_FLUSH_INTERVAL_S):
+                        events.extend(self.flush_text())
         
         # ─────────────────────────────────────────────────────
         # Tool Calls (capture, etc.)
@@ -241,9 +294,23 @@ class EventTranslator:
         
         return events
     
+    def flush_text(self) -> list:
+        """Emit buffered text chunks as a single TEXT_MESSAGE_CONTENT event."""
+        if not self._pending_text:
+            return []
+        
+        delta = "".join(self._pending_text)
+        self._pending_text.clear()
+        self._pending_len = 0
+        return [TextMessageContentEvent(
+            type=EventType.TEXT_MESSAGE_CONTENT,
+            message_id=self.message_id,
+            delta=delta,
+        )]
+    
     def finalize_message(self) -> list:
         """Close any open message stream."""
-        events = []
+        events = self.flush_text()
         if self.in_message:
             events.append(TextMessageEndEvent(
                 type=EventType.TEXT_MESSAGE_END,
@@ -0,0 +1,34 @@
+"""
+Gunicorn config for running the AG-UI server with several Uvicorn workers.
+
+Run (from src/, like start_dev.sh; gunicorn is in requirements.txt):
+    gunicorn -c backend/gunicorn_conf.py backend.server:app
+
+Each worker is a separate process with its own event loop, so a long
+Gemini analysis or pipeline run on one worker no longer holds up requests
+on the others. Process-wide clients are created per worker in the FastAPI
+lifespan handler (see server.py).
+"""
+import os
+
+from uvicorn_worker import UvicornWorker  # uvicorn.workers is deprecated
+
+
+# Max concurrent connections per worker; beyond this Uvicorn answers 503
+# instead of accepting more upload/analysis work than the worker can hold
+LIMIT_CONCURRENCY = int(os.getenv("LIMIT_CONCURRENCY", "50"))
+
+
+class LimitedUvicornWorker(UvicornWorker):
+    """Uvicorn worker with a per-worker concurrency cap."""
+
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "limit_concurrency": LIMIT_CONCURRENCY}
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+worker_class = "backend.gunicorn_conf.LimitedUvicornWorker"
+
+# Long analysis requests and SSE pipeline streams keep workers busy for minutes
+timeout = 300
+graceful_timeout = 30
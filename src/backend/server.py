@@ -7,24 +7,68 @@ Run:
     
 Or from src:
     python -m uvicorn src.ag_ui.server:app --reload --port 8000
+
+Production (several worker processes, see gunicorn_conf.py), from src:
+    gunicorn -c backend/gunicorn_conf.py backend.server:app
 """
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, Literal
+from typing import Any, Callable, Optional, Literal
+import asyncio
+import hashlib
+import json
+import logging
+import queue
 import uuid
-import tempfile
 import os
+import time
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 
+import orjson
 from ag_ui.core import RunAgentInput
-from .adapter import run_pipeline_stream, SSE_CONTENT_TYPE, get_capture_tasks_for_project
+from db.supabase_client import get_supabase
+from tools.storage import upload_asset_bytes
+from tools.image_analyzer import analyze_image_bytes, analyze_image_batch_bytes
+from .adapter import run_pipeline_stream, batch_frames, SSE_CONTENT_TYPE, get_capture_tasks_for_project
+
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create process-wide clients and logging once at startup."""
+    # Shared by REST handlers via request.app.state.supabase
+    app.state.supabase = get_supabase()
+
+    # Backend log records are written to stderr by a listener thread, so
+    # request handlers never block on the stream
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, stream_handler)
+    queue_handler = QueueHandler(log_queue)
+
+    backend_logger = logging.getLogger(__package__)
+    backend_logger.addHandler(queue_handler)
+    backend_logger.setLevel(logging.INFO)
+    backend_logger.propagate = False
+    listener.start()
+    try:
+        yield
+    finally:
+        listener.stop()
+        backend_logger.removeHandler(queue_handler)
 
 
 app = FastAPI(
     title="StreamLine AG-UI Server",
     description="AG-UI compatible API for video production pipeline",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS for local development
@@ -38,6 +82,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # Browsers cache preflights for a day instead of 10 minutes
 )
 
 
@@ -62,18 +107,23 @@ async def pipeline_endpoint(input_data: RunAgentInput):
         include_render = input_data.state.get("include_render", True)
         include_music = input_data.state.get("include_music", True)
     
+    # Frames are pre-encoded SSE bytes with their own 15s heartbeat comments;
+    # frames produced together (e.g. token bursts) go out as one write
     return StreamingResponse(
-        run_pipeline_stream(
+        batch_frames(run_pipeline_stream(
             input_data,
             mode=mode,
             include_render=include_render,
             include_music=include_music,
-        ),
+        )),
         media_type=SSE_CONTENT_TYPE,
+        # No Connection header: it is forbidden on HTTP/2 and the default on
+        # HTTP/1.1, where the server already uses chunked framing for a body
+        # without Content-Length. Behind nginx also set
+        # `proxy_buffering off; proxy_http_version 1.1;` for this route.
         headers={
             "Cache-Control": "no-cache",
             "X-Accel-Buffering": "no",  # Disable nginx buffering
-            "Connection": "keep-alive",
         },
     )
 
@@ -82,35 +132,109 @@ async def pipeline_endpoint(input_data: RunAgentInput):
 # REST Endpoints (for frontend data fetching)
 # ─────────────────────────────────────────────────────────────
 
+# Polled read endpoints: bodies are cached per worker for a short TTL and
+# carry an ETag, so repeat polls skip Supabase and unchanged ones get an
+# empty 304. Projects are versioned by updated_at (kept current by the
+# update_video_projects_updated_at trigger, migration 004); capture_tasks
+# has no such trigger, so the captures ETag hashes the response body.
+READ_CACHE_TTL_S = 2.0
+READ_CACHE_MAX_ENTRIES = 1024
+READ_CACHE_CONTROL = "private, max-age=2"
+
+_read_cache: dict[tuple[str, str], tuple[float, bytes, str]] = {}
+
+
+async def cached_json_response(
+    request: Request,
+    key: tuple[str, str],
+    fetch,
+    etag_source: Optional[Callable[[Any], str]] = None,
+) -> Response:
+    """
+    Serve a JSON body from the short-lived read cache with ETag support.
+
+    Args:
+        request: Incoming request (checked for If-None-Match)
+        key: Cache key, e.g. ("project", project_id)
+        fetch: Async callable returning the JSON-serializable body on a miss
+        etag_source: Maps the body to the string the ETag is hashed from
+                     (e.g. id + updated_at); None hashes the serialized body
+
+    Returns:
+        200 with the JSON body, or 304 with no body if the client's ETag matches
+    """
+    now = time.monotonic()
+    entry = _read_cache.get(key)
+    if entry is None or entry[0] <= now:
+        data = await fetch()
+        body = orjson.dumps(data)
+        version = etag_source(data).encode() if etag_source else body
+        etag = '"%s"' % hashlib.blake2b(version, digest_size=16).hexdigest()
+        if len(_read_cache) >= READ_CACHE_MAX_ENTRIES:
+            for stale_key in [k for k, v in _read_cache.items() if v[0] <= now]:
+                del _read_cache[stale_key]
+            if len(_read_cache) >= READ_CACHE_MAX_ENTRIES:
+                _read_cache.clear()
+        entry = _read_cache[key] = (now + READ_CACHE_TTL_S, body, etag)
+
+    _, body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": READ_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.get("/projects/{project_id}")
-async def get_project(project_id: str):
+async def get_project(project_id: str, request: Request):
     """Get project details."""
-    from db.supabase_client import get_supabase
-
-    supabase = get_supabase()
-    result = supabase.table("video_projects") \
-        .select("*") \
-        .eq("id", project_id) \
-        .single() \
-        .execute()
-    
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    return result.data
+    supabase = request.app.state.supabase
+
+    async def fetch():
+        result = await asyncio.to_thread(
+            lambda: supabase.table("video_projects")
+            .select("*")
+            .eq("id", project_id)
+            .single()
+            .execute()
+        )
+        
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        return result.data
+
+    return await cached_json_response(
+        request,
+        ("project", project_id),
+        fetch,
+        etag_source=lambda row: f"{project_id}:{row.get('updated_at')}",
+    )
 
 
 @app.get("/projects/{project_id}/captures")
-async def get_captures(project_id: str):
+async def get_captures(project_id: str, request: Request):
     """Get capture tasks for a project."""
-    tasks = get_capture_tasks_for_project(project_id)
-    return {"captures": tasks}
+    async def fetch():
+        tasks, _ = await asyncio.to_thread(get_capture_tasks_for_project, project_id)
+        return {"captures": tasks}
+
+    return await cached_json_response(request, ("captures", project_id), fetch)
 
 
 # ─────────────────────────────────────────────────────────────
 # Upload Mode Endpoints
 # ─────────────────────────────────────────────────────────────
 
+# Concurrent Supabase Storage uploads per batch request
+MAX_CONCURRENT_UPLOADS = 10
+
+
+def storage_name_for(file: UploadFile) -> str:
+    """Random object name keeping the upload's extension (for content type)."""
+    suffix = os.path.splitext(file.filename or ".png")[1]
+    return f"{uuid.uuid4().hex}{suffix}"
+
+
 class UploadProjectRequest(BaseModel):
     """Request to create project from uploads."""
     user_input: str
@@ -118,37 +242,42 @@ class UploadProjectRequest(BaseModel):
 
 
 @app.post("/projects/from-uploads")
-async def create_project_from_uploads(request: UploadProjectRequest):
+async def create_project_from_uploads(request: UploadProjectRequest, http_request: Request):
     """
     Create a video project from uploaded assets.
 
     Returns project_id to use with editor-only mode.
     """
-    from db.supabase_client import get_supabase
-
-    supabase = get_supabase()
+    supabase = http_request.app.state.supabase
     
     # Create project
     project_id = str(uuid.uuid4())
     
-    supabase.table("video_projects").insert({
+    # supabase-py is synchronous: run queries off the event loop
+    await asyncio.to_thread(lambda: supabase.table("video_projects").insert({
         "id": project_id,
         "user_input": request.user_input,
         "status": "aggregated",  # Ready for editor
         "source": "upload",
         "pipeline_mode": "upload",
-    }).execute()
+    }).execute())
     
-    # Create capture tasks for each asset
-    for i, asset in enumerate(request.assets):
-        supabase.table("capture_tasks").insert({
-            "id": str(uuid.uuid4()),
+    # Create capture tasks for all assets in one bulk insert. Task ids come
+    # from a single urandom read; Postgres accepts the unhyphenated hex form.
+    raw = os.urandom(16 * len(request.assets))
+    rows = [
+        {
+            "id": uuid.UUID(bytes=raw[i * 16:(i + 1) * 16], version=4).hex,
             "video_project_id": project_id,
             "task_description": asset.get("description", f"Uploaded asset {i+1}"),
             "capture_type": "screenshot",
             "asset_url": asset["url"],
             "status": "success",
-        }).execute()
+        }
+        for i, asset in enumerate(request.assets)
+    ]
+    if rows:
+        await asyncio.to_thread(lambda: supabase.table("capture_tasks").insert(rows).execute())
     
     return {
         "project_id": project_id,
@@ -168,50 +297,44 @@ async def upload_file(
     Analyzes the image content using Gemini Vision to extract detailed descriptions.
     User's description is passed as context to guide the AI analysis.
     """
-    from tools.storage import upload_asset
-    from tools.image_analyzer import analyze_image
-
-    # Save to temp file
-    suffix = os.path.splitext(file.filename or ".png")[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
-
-    try:
-        # Analyze image with Gemini Vision, passing user's description as context
-        print(f"🔍 Analyzing image: {file.filename}")
-        if description:
-            print(f"   📝 User note: {description}")
-        
-        analysis = analyze_image(tmp_path, user_note=description)
-
-        # Use AI-generated description if available, fallback to user description or filename
-        final_description = analysis.get("description")
-        if not final_description or "error" in analysis:
-            # Fallback to user-provided description or filename
-            fallback = description or file.filename or "Uploaded image"
-            final_description = f"Image file (portrait): {fallback}"
-            print(f"⚠️  Analysis failed, using fallback: {final_description}")
-        else:
-            print(f"✓ Analysis complete: {final_description[:100]}...")
-
-        # Upload to Supabase with a temp project ID
-        url = upload_asset(
-            tmp_path,
+    # Analysis and upload both work on the in-memory body, no temp file
+    image_data = await file.read()
+    storage_name = storage_name_for(file)
+
+    # Analyze image with Gemini Vision, passing user's description as context,
+    # while the same bytes are uploaded to Supabase with a temp project ID
+    logger.info("🔍 Analyzing image: %s", file.filename)
+    if description:
+        logger.info("   📝 User note: %s", description)
+    
+    analysis, url = await asyncio.gather(
+        asyncio.to_thread(analyze_image_bytes, image_data, user_note=description),
+        asyncio.to_thread(
+            upload_asset_bytes,
+            image_data,
+            storage_name,
             project_id="uploads",
             subfolder="pending",
-        )
+        ),
+    )
 
-        return {
-            "url": url,
-            "filename": file.filename,
-            "description": final_description,
-            "width": analysis.get("width", 0),
-            "height": analysis.get("height", 0),
-        }
-    finally:
-        os.unlink(tmp_path)
+    # Use AI-generated description if available, fallback to user description or filename
+    final_description = analysis.get("description")
+    if not final_description or "error" in analysis:
+        # Fallback to user-provided description or filename
+        fallback = description or file.filename or "Uploaded image"
+        final_description = f"Image file (portrait): {fallback}"
+        logger.warning("⚠️  Analysis failed, using fallback: %s", final_description)
+    else:
+        logger.info("✓ Analysis complete: %.100s...", final_description)
+
+    return {
+        "url": url,
+        "filename": file.filename,
+        "description": final_description,
+        "width": analysis.get("width", 0),
+        "height": analysis.get("height", 0),
+    }
 
 
 class BatchUploadRequest(BaseModel):
@@ -234,10 +357,6 @@ async def upload_batch(
         files: List of image files
         descriptions: JSON string of user notes, e.g. '["Dashboard", "Settings", ""]'
     """
-    import json
-    from tools.storage import upload_asset
-    from tools.image_analyzer import analyze_image_batch
-    
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
     
@@ -251,55 +370,46 @@ async def upload_batch(
     if len(user_notes) != len(files):
         user_notes = user_notes + [""] * (len(files) - len(user_notes))
     
-    # Save all files to temp
-    temp_paths = []
-    filenames = []
+    # UploadFile bodies are already spooled by Starlette (in RAM while small),
+    # so analysis and upload read them directly instead of via temp files
+    images = [await file.read() for file in files]
+    filenames = [file.filename for file in files]
     
-    try:
-        for file in files:
-            suffix = os.path.splitext(file.filename or ".png")[1]
-            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-            content = await file.read()
-            tmp.write(content)
-            tmp.close()
-            temp_paths.append(tmp.name)
-            filenames.append(file.filename)
-        
-        # Batch analyze with user notes
-        print(f"🔍 Batch analyzing {len(temp_paths)} images...")
-        analyses = analyze_image_batch(temp_paths, user_notes=user_notes)
-        
-        # Upload all files
-        results = []
-        for analysis, filename, temp_path in zip(analyses, filenames, temp_paths):
-            url = upload_asset(
-                temp_path,
+    # Batch analysis and the per-file uploads are independent: run them together
+    logger.info("🔍 Batch analyzing %d images...", len(images))
+    upload_semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+
+    async def upload(image_data: bytes, storage_name: str) -> str:
+        async with upload_semaphore:
+            return await asyncio.to_thread(
+                upload_asset_bytes,
+                image_data,
+                storage_name,
                 project_id="uploads",
                 subfolder="pending",
             )
-            
-            results.append({
-                "url": url,
-                "filename": filename,
-                "description": analysis.get("description", f"Image file (portrait): {filename}"),
-                "width": analysis.get("width", 0),
-                "height": analysis.get("height", 0),
-            })
-            
-            print(f"✓ {filename}: {analysis.get('description', '')[:80]}...")
+
+    analyses, *urls = await asyncio.gather(
+        asyncio.to_thread(analyze_image_batch_bytes, images, user_notes=user_notes),
+        *(upload(image_data, storage_name_for(file)) for image_data, file in zip(images, files)),
+    )
+    
+    results = []
+    for analysis, filename, url in zip(analyses, filenames, urls):
+        results.append({
+            "url": url,
+            "filename": filename,
+            "description": analysis.get("description", f"Image file (portrait): {filename}"),
+            "width": analysis.get("width", 0),
+            "height": analysis.get("height", 0),
+        })
         
-        return {
-            "uploads": results,
-            "total": len(results),
-        }
+        logger.info("✓ %s: %.80s...", filename, analysis.get("description", ""))
     
-    finally:
-        # Cleanup temp files
-        for path in temp_paths:
-            try:
-                os.unlink(path)
-            except:
-                pass
+    return {
+        "uploads": results,
+        "total": len(results),
+    }
 
 
 # ─────────────────────────────────────────────────────────────
@@ -334,5 +444,6 @@ async def root():
 
 
 if __name__ == "__main__":
+    # Single-process dev server; use gunicorn_conf.py for multiple workers
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,7 +1,9 @@
 from .supabase_client import (
     # Tasks
     create_task,
+    create_tasks_bulk,
     get_task,
+    get_tasks_by_ids,
     update_task_status,
     increment_attempt,
     get_pending_tasks,
@@ -15,13 +17,18 @@ from .supabase_client import (
     update_video_project_status,
     get_video_project,
     delete_video_project,
+    # Record cache
+    invalidate_task,
+    invalidate_video_project,
     # Session cleanup
     cleanup_session,
 )
 
 __all__ = [
     "create_task",
+    "create_tasks_bulk",
     "get_task",
+    "get_tasks_by_ids",
     "update_task_status",
     "increment_attempt",
     "get_pending_tasks",
@@ -34,5 +41,7 @@ __all__ = [
     "update_video_project_status",
     "get_video_project",
     "delete_video_project",
+    "invalidate_task",
+    "invalidate_video_project",
     "cleanup_session",
 ]
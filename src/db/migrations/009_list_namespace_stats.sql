@@ -0,0 +1,24 @@
+-- Migration 009: list_namespace_stats() for the RAG knowledge base
+-- Aggregates document/relation counts per namespace server-side so
+-- `ingest_knowledge.py --list` transfers one row per namespace instead of
+-- one row per document.
+
+CREATE OR REPLACE FUNCTION list_namespace_stats()
+RETURNS TABLE (namespace text, documents bigint, relations bigint)
+LANGUAGE sql STABLE AS $$
+    SELECT d.namespace, d.documents, COALESCE(r.relations, 0) AS relations
+    FROM (
+        SELECT namespace, COUNT(*) AS documents
+        FROM documents
+        GROUP BY namespace
+    ) d
+    LEFT JOIN (
+        SELECT namespace, COUNT(*) AS relations
+        FROM doc_relations
+        GROUP BY namespace
+    ) r ON r.namespace = d.namespace
+    ORDER BY d.namespace;
+$$;
+
+COMMENT ON FUNCTION list_namespace_stats() IS
+'Per-namespace document and relation counts for the RAG knowledge base.';
@@ -0,0 +1,13 @@
+-- Migration 010: content_hash on RAG documents
+-- Lets ingest_knowledge.py reuse an existing embedding when the same
+-- content is ingested again instead of calling the embeddings API.
+-- Not unique: identical content may legitimately live in several namespaces.
+
+ALTER TABLE documents
+ADD COLUMN IF NOT EXISTS content_hash text;
+
+CREATE INDEX IF NOT EXISTS idx_documents_content_hash
+ON documents (content_hash);
+
+COMMENT ON COLUMN documents.content_hash IS
+'blake2b (16-byte) hex digest of content, used to deduplicate embeddings.';
@@ -0,0 +1,13 @@
+-- Migration 011: pattern_id on RAG documents
+-- Stores the knowledge-file pattern id so ingest_knowledge.py can upsert a
+-- whole batch on (namespace, pattern_id) and get every document id back
+-- from the same request. Re-ingesting a file updates rows in place.
+
+ALTER TABLE documents
+ADD COLUMN IF NOT EXISTS pattern_id text;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_namespace_pattern_id
+ON documents (namespace, pattern_id);
+
+COMMENT ON COLUMN documents.pattern_id IS
+'Pattern id from the ingested knowledge JSON (NULL for documents added elsewhere).';
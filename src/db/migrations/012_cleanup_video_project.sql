@@ -0,0 +1,18 @@
+-- Migration 012: cleanup_video_project(pid) RPC
+-- Deletes a project and every row that references it in one round-trip
+-- and one transaction, children first so foreign keys are satisfied.
+
+CREATE OR REPLACE FUNCTION cleanup_video_project(pid uuid)
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM generated_assets WHERE video_project_id = pid;
+    DELETE FROM clip_tasks WHERE video_project_id = pid;
+    DELETE FROM capture_tasks WHERE video_project_id = pid;
+    DELETE FROM video_specs WHERE video_project_id = pid;
+    DELETE FROM video_projects WHERE id = pid;
+END;
+$$;
+
+COMMENT ON FUNCTION cleanup_video_project(uuid) IS
+'Delete a video project and all dependent rows in a single transaction.';
@@ -0,0 +1,29 @@
+-- Migration 013: cleanup_video_project(pid, tables)
+-- Callers that know which child tables they wrote to (the pipeline session
+-- tracks this) pass them in, so untouched tables are not scanned.
+-- tables = NULL keeps the old behaviour of clearing every child table.
+
+DROP FUNCTION IF EXISTS cleanup_video_project(uuid);
+
+CREATE OR REPLACE FUNCTION cleanup_video_project(pid uuid, tables text[] DEFAULT NULL)
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF tables IS NULL OR 'generated_assets' = ANY(tables) THEN
+        DELETE FROM generated_assets WHERE video_project_id = pid;
+    END IF;
+    IF tables IS NULL OR 'clip_tasks' = ANY(tables) THEN
+        DELETE FROM clip_tasks WHERE video_project_id = pid;
+    END IF;
+    IF tables IS NULL OR 'capture_tasks' = ANY(tables) THEN
+        DELETE FROM capture_tasks WHERE video_project_id = pid;
+    END IF;
+    IF tables IS NULL OR 'video_specs' = ANY(tables) THEN
+        DELETE FROM video_specs WHERE video_project_id = pid;
+    END IF;
+    DELETE FROM video_projects WHERE id = pid;
+END;
+$$;
+
+COMMENT ON FUNCTION cleanup_video_project(uuid, text[]) IS
+'Delete a video project and its dependent rows (optionally only in the given child tables) in a single transaction.';
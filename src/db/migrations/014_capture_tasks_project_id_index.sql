@@ -0,0 +1,7 @@
+-- Migration 014: (video_project_id, created_at) index on capture_tasks
+-- The backend polls a project's capture tasks in creation order (the order
+-- the UI shows, and stable for change detection); this index serves that
+-- query without a sort.
+
+CREATE INDEX IF NOT EXISTS idx_capture_tasks_project_id
+ON capture_tasks (video_project_id, created_at);
@@ -0,0 +1,17 @@
+-- Migration 015: increment_attempt(task_id) for capture retries
+-- Bumps attempt_count in a single UPDATE ... RETURNING, so a retry costs
+-- one round trip and concurrent increments can't overwrite each other
+-- (the client used to read the count and write back count + 1).
+
+CREATE OR REPLACE FUNCTION increment_attempt(task_id uuid)
+RETURNS int
+LANGUAGE sql AS $$
+    UPDATE capture_tasks
+    SET attempt_count = attempt_count + 1,
+        updated_at = now()
+    WHERE id = increment_attempt.task_id
+    RETURNING attempt_count;
+$$;
+
+COMMENT ON FUNCTION increment_attempt(uuid) IS
+'Atomically increments capture_tasks.attempt_count and returns the new value.';
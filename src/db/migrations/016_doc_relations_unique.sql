@@ -0,0 +1,16 @@
+-- Migration 016: unique graph edges in doc_relations
+-- Documents keep their ids across re-ingests (upsert on namespace,
+-- pattern_id; migration 011), so ingest_knowledge.py upserts relations on
+-- the full edge key and re-running a file no longer duplicates every edge.
+
+-- Drop duplicates left by earlier re-ingests, keeping one row per edge
+DELETE FROM doc_relations a
+USING doc_relations b
+WHERE a.ctid > b.ctid
+  AND a.namespace = b.namespace
+  AND a.from_id = b.from_id
+  AND a.to_id = b.to_id
+  AND a.relation_type = b.relation_type;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_doc_relations_edge
+ON doc_relations (namespace, from_id, to_id, relation_type);
@@ -5,17 +5,33 @@ API Key Usage:
 - This module uses the SECRET key (sb_secret_...) by default
 - The secret key bypasses RLS for full database access
 - For RLS-respecting operations, pass elevated=False to get_supabase()
+- One client is created per key and reused, so all calls share its
+  connection pool; call reset_clients() after changing Supabase config
+- get_task/get_video_project rows are kept in a small in-process LRU cache
+  for RECORD_CACHE_TTL_S; this module's write helpers invalidate it, and
+  code that writes those rows directly calls invalidate_task() /
+  invalidate_video_project(). The TTL bounds staleness from writes made by
+  other processes (e.g. other gunicorn workers)
 
 Cloud-First Architecture:
 - Captures are uploaded to Supabase Storage immediately after validation
 - asset_url (cloud) is the primary reference for downstream processing
 - asset_path (local) is kept for fallback/debugging
 """
+import threading
+import time
+from collections import OrderedDict
+
 from supabase import create_client, Client
 from config import Config
 from typing import Optional
 
 
+# One client per API key (keyed on `elevated`), created on first use
+_clients: dict[bool, Client] = {}
+_clients_lock = threading.Lock()
+
+
 def get_supabase(elevated: bool = True) -> Client:
     """
     Get Supabase client with appropriate API key.
@@ -25,10 +41,87 @@ def get_supabase(elevated: bool = True) -> Client:
                  If False, use publishable key (respects RLS).
 
     Returns:
-        Supabase Client instance
+        Supabase Client instance (shared across calls)
+    """
+    elevated = bool(elevated)
+    client = _clients.get(elevated)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(elevated)
+            if client is None:
+                api_key = Config.get_supabase_key(elevated=elevated)
+                client = _clients[elevated] = create_client(Config.SUPABASE_URL, api_key)
+    return client
+
+
+def reset_clients() -> None:
+    """Drop cached clients so the next get_supabase() picks up new config."""
+    with _clients_lock:
+        _clients.clear()
+
+
+# ─────────────────────────────────────────────────────────────
+# Record Cache
+# ─────────────────────────────────────────────────────────────
+
+# Seconds a cached row is trusted; writes from other processes show up after this
+RECORD_CACHE_TTL_S = 5.0
+
+
+class _RecordCache:
     """
-    api_key = Config.get_supabase_key(elevated=elevated)
-    return create_client(Config.SUPABASE_URL, api_key)
+    Thread-safe LRU of rows keyed by ID, with a TTL and per-key
+    invalidation (which functools.lru_cache lacks).
+    """
+
+    def __init__(self, maxsize: int, ttl_s: float = RECORD_CACHE_TTL_S):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._rows: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._rows.get(key)
+            if entry is None:
+                return None
+            expires, row = entry
+            if expires <= time.monotonic():
+                del self._rows[key]
+                return None
+            self._rows.move_to_end(key)
+        # Copy so callers can't mutate the cached row
+        return dict(row)
+
+    def put(self, key: str, row: dict) -> None:
+        with self._lock:
+            self._rows[key] = (time.monotonic() + self.ttl_s, dict(row))
+            self._rows.move_to_end(key)
+            if len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+
+    def pop(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._rows.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+
+
+_task_cache = _RecordCache(maxsize=256)
+_video_project_cache = _RecordCache(maxsize=256)
+
+
+def invalidate_task(*task_ids: str) -> None:
+    """Drop cached get_task() rows after writing them outside this module."""
+    _task_cache.pop(*task_ids)
+
+
+def invalidate_video_project(project_id: str) -> None:
+    """Drop the cached get_video_project() row after writing it outside this module."""
+    _video_project_cache.pop(project_id)
 
 
 # Alias for backward compatibility
@@ -68,12 +161,18 @@ def update_video_project_status(project_id: str, status: str) -> None:
         "status": status,
         "updated_at": "now()"
     }).eq("id", project_id).execute()
+    _video_project_cache.pop(project_id)
 
 
 def get_video_project(project_id: str) -> Optional[dict]:
-    """Get video project by ID."""
+    """Get video project by ID (cached until written through this module)."""
+    project = _video_project_cache.get(project_id)
+    if project is not None:
+        return project
     db = get_supabase()
     result = db.table("video_projects").select("*").eq("id", project_id).single().execute()
+    if result.data:
+        _video_project_cache.put(project_id, result.data)
     return result.data
 
 
@@ -82,6 +181,7 @@ def delete_video_project(project_id: str) -> bool:
     try:
         db = get_supabase()
         db.table("video_projects").delete().eq("id", project_id).execute()
+        _video_project_cache.pop(project_id)
         return True
     except Exception as e:
         print(f"Error deleting video project: {e}")
@@ -121,13 +221,62 @@ def create_task(
     return result.data[0]["id"]
 
 
+# Rows per INSERT request, keeps bulk payloads well under PostgREST limits
+BULK_INSERT_CHUNK = 500
+
+
+def create_tasks_bulk(rows: list[dict]) -> list[str]:
+    """
+    Create many capture tasks with one multi-row INSERT per chunk.
+    
+    Args:
+        rows: Task dicts with the create_task fields (video_project_id,
+              app_bundle_id, task_description, capture_type); status
+              defaults to 'pending'
+    
+    Returns:
+        Task IDs, in the same order as rows
+    """
+    if not rows:
+        return []
+    db = get_supabase()
+    task_ids = []
+    for start in range(0, len(rows), BULK_INSERT_CHUNK):
+        chunk = [{"status": "pending", **row} for row in rows[start:start + BULK_INSERT_CHUNK]]
+        result = db.table("capture_tasks").insert(chunk).execute()
+        task_ids.extend(r["id"] for r in result.data)
+    return task_ids
+
+
 def get_task(task_id: str) -> dict:
-    """Get task by ID."""
+    """Get task by ID (cached until written through this module)."""
+    task = _task_cache.get(task_id)
+    if task is not None:
+        return task
     db = get_supabase()
     result = db.table("capture_tasks").select("*").eq("id", task_id).single().execute()
+    if result.data:
+        _task_cache.put(task_id, result.data)
     return result.data
 
 
+def get_tasks_by_ids(task_ids: list[str]) -> dict[str, dict]:
+    """
+    Get several tasks in one query instead of one get_task() per ID.
+    
+    Args:
+        task_ids: Task UUIDs
+    
+    Returns:
+        Dict of task ID -> task row (missing IDs are absent)
+    """
+    if not task_ids:
+        return {}
+    db = get_supabase()
+    result = db.table("capture_tasks").select("*").in_("id", list(task_ids)).execute()
+    return {row["id"]: row for row in result.data}
+
+
 def update_task_status(
     task_id: str, 
     status: str, 
@@ -154,6 +303,7 @@ def update_task_status(
     if validation_notes:
         update_data["validation_notes"] = validation_notes
     db.table("capture_tasks").update(update_data).eq("id", task_id).execute()
+    _task_cache.pop(task_id)
 
 
 def update_task_asset_url(task_id: str, asset_url: str) -> None:
@@ -166,17 +316,19 @@ def update_task_asset_url(task_id: str, asset_url: str) -> None:
         "asset_url": asset_url,
         "updated_at": "now()"
     }).eq("id", task_id).execute()
+    _task_cache.pop(task_id)
 
 
 def increment_attempt(task_id: str) -> int:
-    """Increment attempt count, return new count."""
+    """
+    Increment attempt count, return new count.
+
+    Runs as one atomic UPDATE ... RETURNING in Postgres
+    (migrations/015_increment_attempt.sql).
+    """
     db = get_supabase()
-    task = get_task(task_id)
-    new_count = task["attempt_count"] + 1
-    db.table("capture_tasks").update({
-        "attempt_count": new_count,
-        "updated_at": "now()"
-    }).eq("id", task_id).execute()
+    new_count = db.rpc("increment_attempt", {"task_id": task_id}).execute().data
+    _task_cache.pop(task_id)
     return new_count
 
 
@@ -231,6 +383,7 @@ def delete_task(task_id: str) -> bool:
     try:
         db = get_supabase()
         db.table("capture_tasks").delete().eq("id", task_id).execute()
+        _task_cache.pop(task_id)
         return True
     except Exception as e:
         print(f"Error deleting task: {e}")
@@ -244,6 +397,7 @@ def delete_tasks_by_ids(task_ids: list[str]) -> int:
     try:
         db = get_supabase()
         db.table("capture_tasks").delete().in_("id", task_ids).execute()
+        _task_cache.pop(*task_ids)
         return len(task_ids)
     except Exception as e:
         print(f"Error deleting tasks: {e}")
@@ -254,12 +408,14 @@ def delete_tasks_by_bundle_id(app_bundle_id: str) -> int:
     """Delete all capture tasks for an app. Returns count deleted."""
     try:
         db = get_supabase()
-        # First get count
-        tasks = get_all_tasks(app_bundle_id)
-        count = len(tasks)
-        if count > 0:
-            db.table("capture_tasks").delete().eq("app_bundle_id", app_bundle_id).execute()
-        return count
+        # Single round trip: PostgREST reports the deleted row count without
+        # sending the rows back
+        result = db.table("capture_tasks").delete(
+            count="exact", returning="minimal"
+        ).eq("app_bundle_id", app_bundle_id).execute()
+        # Deleted IDs aren't returned, so drop every cached task
+        _task_cache.clear()
+        return result.count or 0
     except Exception as e:
         print(f"Error deleting tasks: {e}")
         return 0
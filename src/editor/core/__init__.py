@@ -23,6 +23,8 @@ from .assembler import edit_assembler_node, assemble_video_spec
 from .music_planner import (
     music_planner_node,
     analyze_timeline_for_music,
+    analyze_clip_tasks_for_music,
+    load_composed_clip_tasks,
     extract_hit_points,
     HitPoint,
     MusicSection,
@@ -55,6 +57,8 @@ __all__ = [
     # Music
     "music_planner_node",
     "analyze_timeline_for_music",
+    "analyze_clip_tasks_for_music",
+    "load_composed_clip_tasks",
     "extract_hit_points",
     "HitPoint",
     "MusicSection",
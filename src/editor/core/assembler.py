@@ -269,6 +269,7 @@ def save_video_spec_to_db(
         The video_spec_id
     """
     from db.supabase_client import get_client
+    from orchestrator.session import get_session
     
     client = get_client()
     
@@ -293,6 +294,7 @@ def save_video_spec_to_db(
     }, on_conflict="video_project_id,version").execute()
     
     if result.data:
+        get_session().touch_table("video_specs")
         print(f"   Saved as version {version}")
         return result.data[0]["id"]
     else:
@@ -358,7 +360,7 @@ def edit_assembler_node(state: dict) -> dict:
     """
     LangGraph node: Assemble the final VideoSpec.
     """
-    from db.supabase_client import get_client
+    from db.supabase_client import get_client, invalidate_video_project
     import os
     
     print("\n📦 Assembling video spec...")
@@ -394,6 +396,7 @@ def edit_assembler_node(state: dict) -> dict:
         client.table("video_projects").update({
             "editor_status": "assembled",
         }).eq("id", video_project_id).execute()
+        invalidate_video_project(video_project_id)
         
         clip_count = len(spec.get("clips", []))
         total_layers = sum(len(c.get("layers", [])) for c in spec.get("clips", []))
@@ -460,6 +460,19 @@ def build_composition_plan(
 # Main Interface
 # ─────────────────────────────────────────────────────────────
 
+def load_composed_clip_tasks(video_project_id: str) -> List[dict]:
+    """Load composed clip tasks for a project, ordered by start time."""
+    from db.supabase_client import get_client
+    
+    client = get_client()
+    
+    result = client.table("clip_tasks").select("*").eq(
+        "video_project_id", video_project_id
+    ).eq("status", "composed").order("start_time_s").execute()
+    
+    return result.data or []
+
+
 def analyze_timeline_for_music(video_project_id: str) -> dict:
     """
     Analyze video timeline and return music generation context.
@@ -474,17 +487,20 @@ def analyze_timeline_for_music(video_project_id: str) -> dict:
             "energy_curve": str,
         }
     """
-    from db.supabase_client import get_client
-    
-    client = get_client()
-    
-    # Load composed clip tasks
-    result = client.table("clip_tasks").select("*").eq(
-        "video_project_id", video_project_id
-    ).eq("status", "composed").order("start_time_s").execute()
-    
-    clip_tasks = result.data or []
+    return analyze_clip_tasks_for_music(load_composed_clip_tasks(video_project_id))
+
+
+# Bump when analyze_clip_tasks_for_music's output changes (invalidates cached analyses)
+MUSIC_ANALYSIS_VERSION = 1
+
+
+def analyze_clip_tasks_for_music(clip_tasks: List[dict]) -> dict:
+    """
+    Analyze already-loaded composed clip tasks for music generation.
     
+    Same output as analyze_timeline_for_music(); split out so callers that
+    already hold the clip rows (e.g. for caching) skip the extra query.
+    """
     if not clip_tasks:
         raise ValueError("No composed clips found. Run editor first.")
     
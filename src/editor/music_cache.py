@@ -0,0 +1,91 @@
+"""
+Music Analysis Cache
+
+Single on-disk cache for music analyses, shared by the music scripts:
+- one JSON file per project and analysis source:
+  assets/cache/music_analysis_<project_id>_<source>.json
+- the stored key hashes the analysis version together with the input, so
+  both new input and changed analysis code (bump its version) miss
+- files are written to a temp name and os.replace()d, so an interrupted
+  run never leaves a truncated entry behind
+
+## Usage
+
+```python
+from editor.music_cache import analysis_cache_key, load_cached_analysis, save_cached_analysis
+
+key = analysis_cache_key(ANALYSIS_VERSION, input_bytes)
+analysis = load_cached_analysis(video_project_id, "spec", key)
+if analysis is None:
+    analysis = analyze(...)
+    save_cached_analysis(video_project_id, "spec", key, analysis)
+```
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+
+CACHE_DIR = Path(__file__).parent.parent.parent / "assets" / "cache"
+
+
+def analysis_cache_key(version: int, data: bytes) -> str:
+    """
+    Cache key for an analysis of `data` by analysis code at `version`.
+
+    Args:
+        version: Analysis version (bumped whenever its output changes)
+        data: Serialized analysis input
+
+    Returns:
+        Hex digest identifying this (version, input) pair
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{version}:".encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _cache_path(video_project_id: str, source: str) -> Path:
+    return CACHE_DIR / f"music_analysis_{video_project_id}_{source}.json"
+
+
+def load_cached_analysis(video_project_id: str, source: str, key: str) -> Optional[dict]:
+    """
+    Return the cached analysis if it was stored under `key`.
+
+    Args:
+        video_project_id: Project the analysis belongs to
+        source: What was analyzed (e.g. "spec", "timeline")
+        key: Expected analysis_cache_key()
+
+    Returns:
+        The analysis, or None on a miss or unreadable cache file
+    """
+    try:
+        cached = orjson.loads(_cache_path(video_project_id, source).read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return None
+    return cached.get("analysis")
+
+
+def save_cached_analysis(video_project_id: str, source: str, key: str, analysis: dict) -> None:
+    """
+    Store an analysis under `key`, replacing the project's previous entry.
+
+    Args:
+        video_project_id: Project the analysis belongs to
+        source: What was analyzed (e.g. "spec", "timeline")
+        key: analysis_cache_key() of the analyzed input
+        analysis: JSON-serializable analysis result
+    """
+    cache_path = _cache_path(video_project_id, source)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(orjson.dumps({"key": key, "analysis": analysis}))
+    os.replace(tmp_path, cache_path)
@@ -0,0 +1,230 @@
+"""
+Audio/Video Muxer
+
+Single FFmpeg mux implementation shared by the music scripts:
+- the video stream is always copied
+- audio is copied when MP4 can hold it as-is (ElevenLabs returns MP3),
+  otherwise it is encoded to AAC
+- the output is written with the MP4 index up front (faststart) so it can
+  be streamed without a second pass
+- when the caller knows the video duration, the output is cut with -t
+  instead of -shortest, so ffmpeg doesn't have to find EOF on both streams
+- stderr is streamed into a bounded tail that is only surfaced on error
+
+## Usage
+
+```python
+from editor.muxer import mux, mux_async
+
+success, error = mux(video_path, audio_path, output_path, duration_s=12.5)
+success, error = await mux_async(video_path, audio_path, output_path)
+```
+"""
+import asyncio
+import subprocess
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+
+# ─────────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────────
+
+# Audio codecs the MP4 muxer accepts without re-encoding
+MP4_COPY_AUDIO_CODECS = {"aac", "mp3", "alac"}
+
+# Lines of ffmpeg stderr kept for error reporting
+STDERR_TAIL_LINES = 50
+
+# Threads per ffmpeg process (batch drivers size their pools around this)
+FFMPEG_THREADS = 2
+
+MUX_TIMEOUT_S = 120
+
+
+# ─────────────────────────────────────────────────────────────
+# Commands
+# ─────────────────────────────────────────────────────────────
+
+def _probe_command(audio_path: Path) -> list[str]:
+    return [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        str(audio_path),
+    ]
+
+
+def build_mux_command(
+    video_path: Path,
+    audio_path: Path,
+    output_path: Path,
+    copy_audio: bool = True,
+    duration_s: Optional[float] = None,
+) -> list[str]:
+    """
+    Build the ffmpeg command that muxes audio_path onto video_path.
+
+    duration_s (normally the VideoSpec length) caps the output with -t;
+    without it the command falls back to -shortest.
+    """
+    if copy_audio:
+        audio_args = ["-c:a", "copy"]
+    else:
+        audio_args = ["-c:a", "aac", "-b:a", "192k"]
+
+    if duration_s is not None:
+        length_args = ["-t", f"{duration_s:.3f}"]
+    else:
+        length_args = ["-shortest"]
+
+    return [
+        "ffmpeg", "-y", "-nostats",
+        "-fflags", "+genpts",
+        "-thread_queue_size", "1024", "-i", str(video_path),
+        "-thread_queue_size", "1024", "-i", str(audio_path),
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+        "-c:v", "copy",
+        *audio_args,
+        "-threads", str(FFMPEG_THREADS),
+        "-avoid_negative_ts", "make_zero",
+        "-movflags", "+faststart",
+        *length_args,
+        str(output_path),
+    ]
+
+
+# ─────────────────────────────────────────────────────────────
+# Sync API
+# ─────────────────────────────────────────────────────────────
+
+def probe_audio_codec(audio_path: Path) -> Optional[str]:
+    """Return the codec name of the first audio stream, or None."""
+    try:
+        result = subprocess.run(
+            _probe_command(audio_path), capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+def mux(
+    video_path: Path,
+    audio_path: Path,
+    output_path: Path,
+    *,
+    copy_audio: bool = True,
+    duration_s: Optional[float] = None,
+) -> tuple[bool, str]:
+    """
+    Mux audio onto video with ffmpeg.
+
+    Args:
+        video_path: Rendered video (its video stream is copied)
+        audio_path: Audio track
+        output_path: Where to write the muxed file
+        copy_audio: Copy the audio stream when MP4-compatible; False forces AAC
+        duration_s: Output length in seconds (the video duration); None uses -shortest
+
+    Returns:
+        (success, error) - error is the tail of ffmpeg's stderr on failure
+    """
+    copy = copy_audio and probe_audio_codec(audio_path) in MP4_COPY_AUDIO_CODECS
+    cmd = build_mux_command(
+        video_path, audio_path, output_path, copy_audio=copy, duration_s=duration_s
+    )
+
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except FileNotFoundError:
+        return False, "FFmpeg not installed"
+
+    # stderr is drained into the bounded tail on a reader thread, so the
+    # timeout below is enforced even while ffmpeg keeps writing (or hangs)
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    reader = threading.Thread(target=stderr_tail.extend, args=(proc.stderr,), daemon=True)
+    reader.start()
+
+    try:
+        proc.wait(timeout=MUX_TIMEOUT_S)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        return False, "FFmpeg timed out"
+    finally:
+        reader.join()
+        proc.stderr.close()
+
+    if proc.returncode != 0:
+        return False, "".join(stderr_tail)
+    return True, ""
+
+
+# ─────────────────────────────────────────────────────────────
+# Async API
+# ─────────────────────────────────────────────────────────────
+
+async def probe_audio_codec_async(audio_path: Path) -> Optional[str]:
+    """Async probe_audio_codec()."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *_probe_command(audio_path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=30)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    return stdout.decode().strip() or None
+
+
+async def mux_async(
+    video_path: Path,
+    audio_path: Path,
+    output_path: Path,
+    *,
+    copy_audio: bool = True,
+    duration_s: Optional[float] = None,
+) -> tuple[bool, str]:
+    """Async mux(), for drivers that run several projects in one event loop."""
+    copy = copy_audio and await probe_audio_codec_async(audio_path) in MP4_COPY_AUDIO_CODECS
+    cmd = build_mux_command(
+        video_path, audio_path, output_path, copy_audio=copy, duration_s=duration_s
+    )
+
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        return False, "FFmpeg not installed"
+
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+
+    async def drain_stderr() -> int:
+        async for line in proc.stderr:
+            stderr_tail.append(line.decode(errors="replace"))
+        return await proc.wait()
+
+    try:
+        await asyncio.wait_for(drain_stderr(), timeout=MUX_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return False, "FFmpeg timed out"
+
+    if proc.returncode != 0:
+        return False, "".join(stderr_tail)
+    return True, ""
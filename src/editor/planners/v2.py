@@ -198,7 +198,7 @@ def create_planner_agent():
 
 def edit_planner_node(state: dict) -> dict:
     """Run the edit planner."""
-    from db.supabase_client import get_client
+    from db.supabase_client import get_client, invalidate_video_project
     from langchain_core.messages import HumanMessage
     
     print("\n🎬 Edit Planner starting...")
@@ -262,6 +262,7 @@ def edit_planner_node(state: dict) -> dict:
     client.table("video_projects").update({
         "planner_prompt_sent": full_prompt
     }).eq("id", video_project_id).execute()
+    invalidate_video_project(video_project_id)
 
     print(f"\n✓ Plan: {len(clip_task_ids)} clips, {total_duration:.1f}s")
     
@@ -9,7 +9,12 @@ import re
 from pathlib import Path
 
 from config import Config, get_model
-from db.supabase_client import get_supabase, update_video_project_status
+from db.supabase_client import (
+    get_supabase,
+    invalidate_task,
+    invalidate_video_project,
+    update_video_project_status,
+)
 from .state import PipelineState
 from .session import get_session
 
@@ -182,6 +187,7 @@ def aggregate_node(state: PipelineState) -> dict:
                     "asset_path": relative_path,  # Store relative path for Remotion
                     "updated_at": "now()"
                 }).eq("id", task["id"]).execute()
+                invalidate_task(task["id"])
                 
                 copied_count += 1
                 print(f"   ✓ {old_path.name} → {relative_path}")
@@ -219,6 +225,7 @@ def aggregate_node(state: PipelineState) -> dict:
             "analysis_summary": updated_summary,
             "updated_at": "now()"
         }).eq("id", video_project_id).execute()
+        invalidate_video_project(video_project_id)
         
         print(f"   ✓ Analysis summary updated with visual design")
     
@@ -17,7 +17,7 @@ from langchain_core.messages import HumanMessage, AIMessage
 
 from config import get_model
 from tools import ANALYZER_TOOLS
-from db.supabase_client import create_task, create_video_project, get_supabase
+from db.supabase_client import create_task, create_video_project, get_supabase, invalidate_task
 from .state import PipelineState, AppManifest
 from .session import get_session
 
@@ -134,6 +134,7 @@ def create_tools(app_bundle_id: str, url_schemes: list[str], temp_project_id: st
         # Track in session for cleanup on interrupt
         session = get_session()
         session.add_task(task_id)
+        session.touch_table("capture_tasks")
         
         return f"Created {ctype} task #{_ctx.tasks_created}: {task_id[:8]}..."
     
@@ -260,6 +261,7 @@ Start by exploring the project structure.""",
                 "video_project_id": video_project_id,
                 "updated_at": "now()"
             }).eq("video_project_id", temp_project_id).execute()
+            invalidate_task(*_ctx.task_ids)
             
             print(f"  ↳ Linked {len(_ctx.task_ids)} tasks to project {video_project_id[:8]}...")
         
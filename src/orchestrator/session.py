@@ -24,6 +24,7 @@ class PipelineSession:
     
     # Created resources
     task_ids: list[str] = field(default_factory=list)
+    touched_tables: set[str] = field(default_factory=set)  # child tables written this run
     
     # Execution state
     is_running: bool = False
@@ -40,6 +41,10 @@ class PipelineSession:
             self.task_ids.append(task_id)
             self.total_tasks = len(self.task_ids)
     
+    def touch_table(self, table: str) -> None:
+        """Record that rows for this project were written to a table."""
+        self.touched_tables.add(table)
+    
     def mark_task_complete(self, task_id: str) -> None:
         """Mark a task as completed."""
         if task_id in self.task_ids:
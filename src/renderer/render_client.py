@@ -214,7 +214,7 @@ def remotion_render_node(state: dict) -> dict:
     """
     LangGraph node: Render the video using Remotion.
     """
-    from db.supabase_client import get_client
+    from db.supabase_client import get_client, invalidate_video_project
     
     video_spec = state.get("video_spec")
     video_project_id = state.get("video_project_id")
@@ -251,6 +251,7 @@ def remotion_render_node(state: dict) -> dict:
     client.table("video_projects").update({
         "editor_status": "rendering",
     }).eq("id", video_project_id).execute()
+    invalidate_video_project(video_project_id)
     
     # Render
     success, output_path, error = render_video(video_spec, output_filename)
@@ -284,6 +285,7 @@ def remotion_render_node(state: dict) -> dict:
             "editor_status": "rendered",
             "final_video_path": video_url,  # Store cloud URL in project
         }).eq("id", video_project_id).execute()
+        invalidate_video_project(video_project_id)
 
         return {
             "render_status": "complete",
@@ -4,7 +4,7 @@ Restart Editor Script
 
 Runs the V2 editor with proper cleanup.
 """
-from db.supabase_client import get_client
+from db.supabase_client import get_client, invalidate_video_project
 from editor import run_editor_standalone
 
 # Replace with your actual project ID
@@ -42,6 +42,7 @@ def cleanup_project(project_id: str):
     client.table("video_projects").update({
         "editor_status": None
     }).eq("id", project_id).execute()
+    invalidate_video_project(project_id)
     print(f"   Reset editor_status")
     
     print("   ✓ Cleanup complete\n")
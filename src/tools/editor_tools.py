@@ -61,6 +61,7 @@ def create_clip_task(
     
     """
     from db.supabase_client import get_client
+    from orchestrator.session import get_session
     
     # Debug: Check if state was properly injected
     video_project_id = state.get("video_project_id") if state else None
@@ -87,6 +88,7 @@ def create_clip_task(
 
     if result.data:
         task_id = result.data[0]["id"]
+        get_session().touch_table("clip_tasks")
 
         # 验证是否真的写入了数据库
         verify = client.table("clip_tasks").select("id").eq("id", task_id).execute()
@@ -117,7 +119,7 @@ def finalize_edit_plan(
     Returns:
         Confirmation with task count
     """
-    from db.supabase_client import get_client
+    from db.supabase_client import get_client, invalidate_video_project
     
     video_project_id = state.get("video_project_id")
     if not video_project_id:
@@ -134,6 +136,7 @@ def finalize_edit_plan(
     client.table("video_projects").update({
         "editor_status": "planning",
     }).eq("id", video_project_id).execute()
+    invalidate_video_project(video_project_id)
     
     print(f"\n📋 Edit plan finalized:")
     print(f"   {clip_count} clip tasks (moments)")
@@ -197,6 +200,7 @@ def generate_enhanced_image(
         aspect_ratio="16:9"
     """
     from db.supabase_client import get_client
+    from orchestrator.session import get_session
     from tools.image_gen import generate_enhanced_screenshot
     from tools.storage import is_remote_url
     
@@ -233,6 +237,7 @@ def generate_enhanced_image(
         return "ERROR: Failed to create generated asset record"
     
     asset_id = result.data[0]["id"]
+    get_session().touch_table("generated_assets")
     
     # Resolve source path: if it's a URL, we can't use it as local reference
     # The image gen API needs a local file
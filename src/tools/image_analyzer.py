@@ -5,6 +5,9 @@ Analyzes uploaded images to extract detailed descriptions for video production.
 Uses natural language embedding format: "[Type] ([Orientation]): description"
 User notes guide analysis without polluting the output.
 """
+import io
+from typing import BinaryIO, Union
+
 from pydantic import BaseModel, Field
 from PIL import Image
 from google import genai
@@ -67,12 +70,12 @@ def get_genai_client() -> genai.Client:
     return genai.Client(api_key=Config.GEMINI_API_KEY)
 
 
-def get_image_dimensions(image_path: str) -> tuple[int, int]:
+def get_image_dimensions(image_path: Union[str, BinaryIO]) -> tuple[int, int]:
     """
     Get image dimensions using PIL.
 
     Args:
-        image_path: Path to image file
+        image_path: Path to image file, or a binary file object
 
     Returns:
         (width, height) tuple, or (0, 0) if unable to read
@@ -156,13 +159,31 @@ def analyze_image(image_path: str, user_note: str = "") -> dict:
             - width: Image width in pixels
             - height: Image height in pixels
     """
-    # Get dimensions first
-    width, height = get_image_dimensions(image_path)
-
     try:
         with open(image_path, "rb") as f:
             image_data = f.read()
+    except OSError as e:
+        print(f"Error analyzing image: {e}")
+        return _failed_analysis(0, 0, e)
+
+    return analyze_image_bytes(image_data, user_note=user_note)
 
+
+def analyze_image_bytes(image_data: bytes, user_note: str = "") -> dict:
+    """
+    Analyze an in-memory image (e.g. an upload body) without a temp file.
+
+    Args:
+        image_data: Encoded image bytes
+        user_note: Optional context from user about this image's purpose/content
+
+    Returns:
+        Same dict as analyze_image()
+    """
+    # Get dimensions first
+    width, height = get_image_dimensions(io.BytesIO(image_data))
+
+    try:
         client = get_genai_client()
 
         # Build prompt with optional user context
@@ -204,17 +225,22 @@ def analyze_image(image_path: str, user_note: str = "") -> dict:
 
     except Exception as e:
         print(f"Error analyzing image: {e}")
-        fallback_desc = append_dimensions_to_description(
-            "Image file (portrait): Image analysis failed, manual review required",
-            width,
-            height
-        )
-        return {
-            "description": fallback_desc,
-            "width": width,
-            "height": height,
-            "error": str(e)
-        }
+        return _failed_analysis(width, height, e)
+
+
+def _failed_analysis(width: int, height: int, error: Exception) -> dict:
+    """Fallback result when single-image analysis fails."""
+    fallback_desc = append_dimensions_to_description(
+        "Image file (portrait): Image analysis failed, manual review required",
+        width,
+        height
+    )
+    return {
+        "description": fallback_desc,
+        "width": width,
+        "height": height,
+        "error": str(error)
+    }
 
 
 def analyze_image_batch(image_paths: list[str], user_notes: list[str] = None) -> list[dict]:
@@ -238,32 +264,59 @@ def analyze_image_batch(image_paths: list[str], user_notes: list[str] = None) ->
     if not image_paths:
         return []
 
+    try:
+        # Read all image data
+        images = []
+        for path in image_paths:
+            with open(path, "rb") as f:
+                images.append(f.read())
+    except OSError as e:
+        print(f"Error analyzing image batch: {e}")
+        results = _failed_batch_analysis([(0, 0)] * len(image_paths), e)
+    else:
+        results = analyze_image_batch_bytes(images, user_notes=user_notes)
+
+    for result, path in zip(results, image_paths):
+        result["path"] = path
+    return results
+
+
+def analyze_image_batch_bytes(images: list[bytes], user_notes: list[str] = None) -> list[dict]:
+    """
+    Analyze in-memory images (e.g. upload bodies) in a single batch request.
+
+    Args:
+        images: Encoded image bytes, one entry per image
+        user_notes: Optional list of user context notes (one per image)
+
+    Returns:
+        Same dicts as analyze_image_batch(), without the "path" key
+    """
+    if not images:
+        return []
+
     # Default to empty notes if not provided
     if user_notes is None:
-        user_notes = [""] * len(image_paths)
+        user_notes = [""] * len(images)
     
     # Ensure notes list matches images list
-    if len(user_notes) != len(image_paths):
-        user_notes = user_notes + [""] * (len(image_paths) - len(user_notes))
+    if len(user_notes) != len(images):
+        user_notes = user_notes + [""] * (len(images) - len(user_notes))
 
     # Get dimensions for all images first
-    dimensions_list = [get_image_dimensions(path) for path in image_paths]
+    dimensions_list = [get_image_dimensions(io.BytesIO(image_data)) for image_data in images]
 
     try:
-        # Read all image data
-        image_parts = []
-        for path in image_paths:
-            with open(path, "rb") as f:
-                image_data = f.read()
-                image_parts.append(
-                    types.Part.from_bytes(
-                        data=image_data,
-                        mime_type="image/png"
-                    )
-                )
+        image_parts = [
+            types.Part.from_bytes(
+                data=image_data,
+                mime_type="image/png"
+            )
+            for image_data in images
+        ]
 
         # Build prompt with user context
-        prompt = BATCH_IMAGE_PROMPT.format(count=len(image_paths))
+        prompt = BATCH_IMAGE_PROMPT.format(count=len(images))
         
         # Add user notes context if any are provided
         if any(user_notes):
@@ -299,37 +352,37 @@ def analyze_image_batch(image_paths: list[str], user_notes: list[str] = None) ->
 
         # Combine descriptions with dimensions
         results = []
-        for i, (path, base_desc) in enumerate(zip(image_paths, base_descriptions)):
-            width, height = dimensions_list[i]
+        for (width, height), base_desc in zip(dimensions_list, base_descriptions):
             full_description = append_dimensions_to_description(base_desc, width, height)
             results.append({
                 "description": full_description,
                 "width": width,
                 "height": height,
-                "path": path,
             })
 
         return results
 
     except Exception as e:
         print(f"Error analyzing image batch: {e}")
-        # Return fallback for each image
-        results = []
-        for i, path in enumerate(image_paths):
-            width, height = dimensions_list[i]
-            fallback_desc = append_dimensions_to_description(
-                "Image file (portrait): Batch analysis failed, manual review required",
-                width,
-                height
-            )
-            results.append({
-                "description": fallback_desc,
-                "width": width,
-                "height": height,
-                "path": path,
-                "error": str(e)
-            })
-        return results
+        return _failed_batch_analysis(dimensions_list, e)
+
+
+def _failed_batch_analysis(dimensions_list: list[tuple[int, int]], error: Exception) -> list[dict]:
+    """Fallback result for each image when batch analysis fails."""
+    results = []
+    for width, height in dimensions_list:
+        fallback_desc = append_dimensions_to_description(
+            "Image file (portrait): Batch analysis failed, manual review required",
+            width,
+            height
+        )
+        results.append({
+            "description": fallback_desc,
+            "width": width,
+            "height": height,
+            "error": str(error)
+        })
+    return results
 
 
 # Commented out: Parallel analysis approach (kept for reference)
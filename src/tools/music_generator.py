@@ -19,6 +19,9 @@ import re
 from elevenlabs.client import ElevenLabs
 from config import Config
 
+# Write buffer for streamed audio chunks (one large write instead of one per chunk)
+AUDIO_WRITE_BUFFER = 1 << 20
+
 
 def _camel_to_snake(name: str) -> str:
     """将 camelCase 转换为 snake_case"""
@@ -75,7 +78,7 @@ class MusicGenerator:
             force_instrumental=force_instrumental,
         )
 
-        with open(output_path, "wb") as f:
+        with open(output_path, "wb", buffering=AUDIO_WRITE_BUFFER) as f:
             for chunk in track:
                 f.write(chunk)
 
@@ -118,7 +121,7 @@ class MusicGenerator:
             respect_sections_durations=respect_durations,
         )
 
-        with open(output_path, "wb") as f:
+        with open(output_path, "wb", buffering=AUDIO_WRITE_BUFFER) as f:
             for chunk in track:
                 f.write(chunk)
 
@@ -506,7 +509,7 @@ def mux_audio_video_node(state: dict) -> dict:
         final_path = output_path
         if video_project_id and is_url:
             try:
-                from db.supabase_client import get_supabase
+                from db.supabase_client import get_supabase, invalidate_video_project
                 print(f"   📤 Uploading final video to cloud...")
 
                 supabase = get_supabase()
@@ -530,6 +533,7 @@ def mux_audio_video_node(state: dict) -> dict:
                 supabase.table("video_projects").update({
                     "final_video_path": final_url,
                 }).eq("id", video_project_id).execute()
+                invalidate_video_project(video_project_id)
 
             except Exception as e:
                 print(f"   ⚠️  Cloud upload failed: {e}, using local path")
@@ -67,10 +67,38 @@ def upload_asset(
     if not os.path.exists(local_path):
         raise FileNotFoundError(f"File not found: {local_path}")
     
+    with open(local_path, "rb") as f:
+        return _upload(f, Path(local_path).name, project_id, bucket, subfolder)
+
+
+def upload_asset_bytes(
+    data: bytes,
+    filename: str,
+    project_id: str,
+    bucket: str = "captures",
+    subfolder: Optional[str] = None,
+) -> str:
+    """
+    Upload in-memory file contents (e.g. an HTTP upload body) to Supabase Storage.
+    
+    Args:
+        data: File contents
+        filename: Object name (its extension sets the content type)
+        project_id: Video project ID (used as folder)
+        bucket: Storage bucket name
+        subfolder: Additional subfolder (e.g., "screenshots", "recordings")
+    
+    Returns:
+        Public URL to the uploaded file
+    """
+    return _upload(data, filename, project_id, bucket, subfolder)
+
+
+def _upload(file, filename: str, project_id: str, bucket: str, subfolder: Optional[str]) -> str:
+    """Upload a file object or bytes under project_id[/subfolder]/filename."""
     supabase = get_storage_client()
     
     # Build storage path
-    filename = Path(local_path).name
     path_parts = [project_id]
     if subfolder:
         path_parts.append(subfolder)
@@ -78,16 +106,15 @@ def upload_asset(
     storage_path = "/".join(path_parts)
     
     # Detect content type
-    content_type, _ = mimetypes.guess_type(local_path)
+    content_type, _ = mimetypes.guess_type(filename)
     content_type = content_type or "application/octet-stream"
     
     # Upload
-    with open(local_path, "rb") as f:
-        result = supabase.storage.from_(bucket).upload(
-            storage_path,
-            f,
-            file_options={"content-type": content_type, "upsert": "true"}
-        )
+    supabase.storage.from_(bucket).upload(
+        storage_path,
+        file,
+        file_options={"content-type": content_type, "upsert": "true"}
+    )
     
     # Get public URL
     public_url = supabase.storage.from_(bucket).get_public_url(storage_path)
@@ -120,7 +147,7 @@ def upload_and_update_task(
         - Uploads file to Supabase Storage
         - Updates capture_tasks.asset_url in database
     """
-    from db.supabase_client import get_client  # Fixed import
+    from db.supabase_client import get_client, invalidate_task  # Fixed import
     
     # Determine subfolder based on type
     subfolder = "recordings" if capture_type == "recording" else "screenshots"
@@ -134,6 +161,7 @@ def upload_and_update_task(
         "asset_url": url,
         "asset_path": local_path,
     }).eq("id", task_id).execute()
+    invalidate_task(task_id)
     
     return url
 